@@ -0,0 +1,83 @@
+import argparse
+import os
+import time
+from typing import List, Tuple
+import numpy as np
+from engine import *
+
+
+def pattern_names(paths: List[str]) -> List[str]:
+    """
+    The name of every board file, its path without extension relative to the directory all of them are in,
+    so files of the same name in different directories keep apart.
+    """
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    return [os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0] for path in paths]
+
+def run_pattern(path: str, steps: int, every: int, output_dir: str = None, incremental: bool = False,
+                history_size: int = HISTORY_SIZE, name: str = None) -> Tuple[dict, np.ndarray]:
+    """
+    Run the board of path for steps generations, or until it reaches a fixed point or a cycle (see CycleDetector).
+    Keep a snapshot every `every` generations and the last one.
+    The snapshots are written to output_dir/<name>.npz - the generation numbers and a (snapshots, rows, cols) array.
+    incremental - step only the frontier of the board, see IncrementalEliminator
+    name - of the board and its snapshots, the file name of path by default, see pattern_names
+    Return the summary of the run and the last generation.
+    """
+    eliminator = (IncrementalEliminator if incremental else CrossEliminator)(board=load_board(path))
+    generations = [0]
+    snapshots = [eliminator.board.copy()]
+    detector = CycleDetector(history_size)
+    detector.add_hash(eliminator.hash, 0)
+    start = time.perf_counter()
+    cycle_start, period = 0, 0
+    while eliminator.generation < steps and not period:
+        cycle_start, period = eliminator.cycle_step(detector)
+        if generations[-1] == eliminator.generation:
+            continue
+        if eliminator.generation % every == 0 or period or eliminator.generation == steps:
+            generations.append(eliminator.generation)
+            snapshots.append(eliminator.board.copy())
+    seconds = time.perf_counter() - start
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    if output_dir:
+        output = os.path.join(output_dir, f"{name}.npz")
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        np.savez_compressed(output, generations=np.array(generations), boards=np.array(snapshots))
+    return {
+        "name": name,
+        "rows": eliminator.rows,
+        "cols": eliminator.cols,
+        "generations": eliminator.generation,
+        "period": period,
+        "cycle_start": cycle_start if period else None,
+        "black": int((eliminator.board == BLACK).sum()),
+        "green": int((eliminator.board == GREEN).sum()),
+        "seconds": seconds,
+    }, eliminator.board
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the cross eliminator on boards without a UI")
+    parser.add_argument("patterns", nargs="+", help="board files, text (see engine.CHARS) or .npy of color codes")
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--every", type=int, default=1, help="keep a snapshot every that many generations")
+    parser.add_argument("--output-dir", default=None, help="write the snapshots of every board here")
+    parser.add_argument("--incremental", action="store_true", help="step only the cells that can still change")
+    parser.add_argument("--history", type=int, default=HISTORY_SIZE, help="generations remembered to find cycles")
+    parser.add_argument("--text", action="store_true", help="print the last generation of every board")
+    args = parser.parse_args()
+    if args.every < 1:
+        parser.error("--every must be at least 1")
+
+    print("pattern, rows, cols, generations, period, cycle start, black, green, seconds")
+    for path, name in zip(args.patterns, pattern_names(args.patterns)):
+        result, board = run_pattern(path, args.steps, args.every, args.output_dir, args.incremental, args.history, name)
+        print(", ".join(f"{value:.3f}" if isinstance(value, float) else str(value) for value in result.values()))
+        if args.text:
+            for row in board.tolist():
+                print("".join(CHARS[code] for code in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import os
+import time
+from typing import List, Tuple
+import numpy as np
+from engine import *
+from patterns import load_patterns
+
+
+def classify_boards(args) -> Tuple[np.ndarray, int]:
+    """
+    Run every board to its fixed point or cycle, a board is classified symmetric if a green cross is left on it.
+    batched - step all the boards together in a BatchEliminator
+    Return the classifications and the number of generations the boards ran until they settled,
+    the starts of their fixed points or cycles. CrossEliminator steps once more to see a fixed point
+    and IncrementalEliminator does not, so the starts are what every mode counts the same.
+    """
+    boards, max_steps, incremental, batched = args
+    if batched:
+        eliminator = BatchEliminator(boards)
+        eliminator.run_to_convergence(max_steps)
+        return (eliminator.boards == GREEN).any(axis=(1, 2)), int(eliminator.starts.sum())
+    eliminator_class = IncrementalEliminator if incremental else CrossEliminator
+    predictions = np.zeros(len(boards), dtype=bool)
+    generations = 0
+    for index, board in enumerate(boards):
+        eliminator = eliminator_class(board=board)
+        start, period = eliminator.run_to_convergence(max_steps)
+        predictions[index] = (eliminator.board == GREEN).any()
+        generations += start
+    return predictions, generations
+
+def split(boards: np.ndarray, parts: int) -> List[np.ndarray]:
+    return [part for part in np.array_split(boards, parts) if len(part)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify crosses with the cross eliminator, and measure its throughput")
+    parser.add_argument("patterns", help=".npz file written by patterns.py")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-steps", type=int, default=None, help="generations a board may run, rows + cols by default")
+    parser.add_argument("--incremental", action="store_true", help="step only the cells that can still change")
+    parser.add_argument("--batched", action="store_true", help="step the boards of every worker together")
+    parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count()
+    results = []
+    print("rows, cols, boards, accuracy, generations, seconds, generations/second")
+    with ProcessPoolExecutor(workers) as executor:
+        for (rows, cols), (boards, labels) in sorted(load_patterns(args.patterns).items()):
+            max_steps = args.max_steps or rows + cols
+            start = time.perf_counter()
+            #batched workers get one shard each, the others more, smaller ones to balance the load
+            shards = split(boards, workers if args.batched else workers * 4)
+            outcomes = list(executor.map(classify_boards, [(shard, max_steps, args.incremental, args.batched) for shard in shards]))
+            seconds = time.perf_counter() - start
+            predictions = np.concatenate([shard_predictions for shard_predictions, _ in outcomes])
+            generations = sum(shard_generations for _, shard_generations in outcomes)
+            results.append({
+                "rows": rows,
+                "cols": cols,
+                "boards": len(boards),
+                "accuracy": float((predictions == labels).mean()),
+                "false_symmetric": int((predictions & ~labels).sum()),
+                "false_non_symmetric": int((~predictions & labels).sum()),
+                "generations": generations,
+                "seconds": seconds,
+                "generations_per_second": generations / seconds,
+            })
+            print(f"{rows}, {cols}, {len(boards)}, {results[-1]['accuracy']:.3f}, {generations}, {seconds:.3f}, {generations / seconds:.0f}")
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
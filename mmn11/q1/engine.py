@@ -0,0 +1,387 @@
+from collections import deque
+from enum import Enum
+from typing import Tuple, Dict
+import numpy as np
+
+class Color(Enum):
+    WHITE = 0
+    BLACK = 1
+    GREEN = 2
+    PURPLE = 3
+    BLUE = 4
+
+rules = [
+    [[Color.BLACK, Color.WHITE, Color.WHITE, Color.WHITE, Color.WHITE], Color.WHITE],
+    [[Color.BLACK, Color.BLACK, Color.WHITE, Color.WHITE, Color.BLACK], Color.WHITE],
+    [[Color.BLACK, Color.WHITE, Color.BLACK, Color.WHITE, Color.WHITE], Color.PURPLE],
+    [[Color.BLACK, Color.WHITE, Color.BLACK, Color.WHITE, Color.PURPLE], Color.PURPLE],
+    [[Color.BLACK, Color.WHITE, Color.WHITE, Color.BLACK, Color.WHITE], Color.PURPLE],
+    [[Color.BLACK, Color.PURPLE, Color.WHITE, Color.BLACK, Color.WHITE], Color.PURPLE],
+    [[Color.BLACK, Color.BLACK, Color.WHITE, Color.WHITE, Color.WHITE], Color.BLUE],
+    [[Color.BLACK, Color.BLACK, Color.WHITE, Color.BLUE, Color.WHITE], Color.BLUE],
+    [[Color.BLACK, Color.WHITE, Color.BLUE, Color.WHITE, Color.BLACK], Color.BLUE],
+    [[Color.BLACK, Color.WHITE, Color.WHITE, Color.WHITE, Color.BLACK], Color.BLUE],
+    [[Color.BLACK, Color.PURPLE, Color.BLUE, Color.BLUE, Color.PURPLE], Color.GREEN]
+]
+
+WHITE, BLACK, GREEN, PURPLE, BLUE = (color.value for color in Color)
+#code of the cells around the board, a rule holds for any color there
+OUTSIDE = len(Color)
+NUM_OF_CODES = OUTSIDE + 1
+#codes of the cells that can still change, white and green are stable states
+UNSTABLE = np.isin(np.arange(NUM_OF_CODES), [BLACK, PURPLE, BLUE])
+#generations a CycleDetector remembers
+HISTORY_SIZE = 64
+#a frontier step marks changed cells on a mask of the board once they are more than 1/DENSE_FRONTIER of it
+DENSE_FRONTIER = 32
+
+
+def next_color(center, north, east, south, west):
+    """
+    The color a cell of color center gets, given the colors of its von Neumann neighbors.
+    The same rules as CellGrid.update_board, on color codes, OUTSIDE for neighbors outside the board.
+    """
+    if center in (WHITE, GREEN, OUTSIDE): #white and green are stable states
+        return center
+    neighbors = (north, east, south, west)
+    if GREEN in neighbors:
+        return GREEN
+    #blue and purple can't be neighbors
+    if center == PURPLE and BLUE in neighbors or center == BLUE and PURPLE in neighbors:
+        return WHITE
+    for rule, result in rules:
+        if center == rule[0].value and all(color == OUTSIDE or color == value.value for color, value in zip(neighbors, rule[1:])):
+            return result.value
+    if center == BLACK and (PURPLE in neighbors or BLUE in neighbors):
+        return WHITE
+    if center == PURPLE and south == WHITE and east == WHITE:
+        return WHITE
+    if center == BLUE and north == WHITE and west == WHITE:
+        return WHITE
+    return center
+
+def build_table() -> np.ndarray:
+    """
+    next_color of every neighborhood, indexed by the codes of (center, north, east, south, west) in base NUM_OF_CODES.
+    """
+    codes = np.indices((NUM_OF_CODES,) * 5).reshape(5, -1).T
+    return np.array([next_color(*neighborhood) for neighborhood in codes.tolist()], dtype=np.uint8)
+
+TABLE = build_table()
+
+
+def neighborhood_index(board: np.ndarray) -> np.ndarray:
+    """
+    Index of the neighborhood of every cell of board in TABLE.
+    The board is in the last two axes, so a stack of boards works the same.
+    """
+    padded = np.pad(board, [(0, 0)] * (board.ndim - 2) + [(1, 1), (1, 1)], constant_values=OUTSIDE)
+    index = padded[..., 1:-1, 1:-1].astype(np.uint16)
+    for neighbors in (padded[..., :-2, 1:-1], padded[..., 1:-1, 2:], padded[..., 2:, 1:-1], padded[..., 1:-1, :-2]):
+        index *= NUM_OF_CODES
+        index += neighbors
+    return index
+
+def step(board: np.ndarray) -> np.ndarray:
+    """
+    The next generation of board, a uint8 array of color codes, or of every board of a (boards, rows, cols) array.
+    """
+    return TABLE[neighborhood_index(board)]
+
+def to_board(colors) -> np.ndarray:
+    return np.array([[color.value for color in row] for row in colors], dtype=np.uint8)
+
+def to_colors(board: np.ndarray):
+    return [[Color(code) for code in row] for row in board.tolist()]
+
+#characters of a board in a text file
+CHARS = {WHITE: ".", BLACK: "#", GREEN: "g", PURPLE: "p", BLUE: "b"}
+CODES = {char: code for code, char in CHARS.items()}
+
+
+def load_board(path: str) -> np.ndarray:
+    """
+    Read a board from a .npy file of color codes, or a text file of CHARS, a line per row.
+    """
+    if path.endswith(".npy"):
+        return np.load(path).astype(np.uint8)
+    with open(path) as board_file:
+        lines = [line.rstrip("\n") for line in board_file if line.strip()]
+    cols = max(len(line) for line in lines)
+    return np.array([[CODES.get(char, WHITE) for char in line.ljust(cols, CHARS[WHITE])] for line in lines], dtype=np.uint8)
+
+def save_board(board: np.ndarray, path: str):
+    if path.endswith(".npy"):
+        np.save(path, board)
+        return
+    with open(path, "w") as board_file:
+        for row in board.tolist():
+            board_file.write("".join(CHARS[code] for code in row) + "\n")
+
+
+def cell_keys(cells: np.ndarray, colors: np.ndarray) -> np.ndarray:
+    """
+    Zobrist keys of cells, flat indices of a board, in colors. White cells have the key 0.
+    A key is the splitmix64 mix of the cell and its color, so no table the size of the board is kept.
+    """
+    keys = cells.astype(np.uint64) * np.uint64(NUM_OF_CODES) + colors.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    keys = (keys ^ (keys >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    keys = (keys ^ (keys >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    keys ^= keys >> np.uint64(31)
+    keys[colors == WHITE] = 0
+    return keys
+
+def board_hash(board: np.ndarray) -> int:
+    """
+    XOR of the keys of all the cells of board, see cell_keys.
+    A board that changes in a few cells gets its new hash from the keys of those cells alone, see CrossEliminator.recolor.
+    """
+    board = board.reshape(-1)
+    cells = np.flatnonzero(board != WHITE)
+    return int(np.bitwise_xor.reduce(cell_keys(cells, board[cells])))
+
+
+class CycleDetector:
+    """
+    Hashes of the last history_size generations of a board, to find a generation that repeats an earlier one.
+    """
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        self.history_size = history_size
+        self.generations: Dict[int, int] = {}
+        self.order = deque()
+
+    def add(self, board: np.ndarray, generation: int) -> int:
+        """
+        Remember board as generation. Return the period if an earlier generation had the same board, else 0.
+        """
+        return self.add_hash(board_hash(board), generation)
+
+    def add_hash(self, key: int, generation: int) -> int:
+        """
+        Like add, given the board_hash of the board.
+        """
+        if key in self.generations:
+            return generation - self.generations[key]
+        self.generations[key] = generation
+        self.order.append(key)
+        if len(self.order) > self.history_size:
+            del self.generations[self.order.popleft()]
+        return 0
+
+
+class CrossEliminator:
+    """
+    The cross eliminator automaton without a UI, its board is a uint8 array of Color codes.
+    """
+    def __init__(self, rows: int = None, cols: int = None, board: np.ndarray = None):
+        if board is None:
+            board = np.full((rows, cols), WHITE, dtype=np.uint8)
+        self.board = board.astype(np.uint8)
+        self.rows, self.cols = self.board.shape
+        self.generation = 0
+        #board_hash of the board, kept up to date from the cells that change
+        self.hash = board_hash(self.board)
+
+    def get_color(self, row: int, col: int) -> Color:
+        return Color(int(self.board[row, col]))
+
+    def recolor(self, rows: np.ndarray, cols: np.ndarray, old: np.ndarray, new: np.ndarray):
+        """
+        Update the hash for the cells at rows and cols, that changed from the colors old to new.
+        """
+        cells = rows * self.cols + cols
+        self.hash ^= int(np.bitwise_xor.reduce(cell_keys(cells, old) ^ cell_keys(cells, new)))
+
+    def set_color(self, row: int, col: int, color: Color):
+        self.recolor(np.array([row]), np.array([col]), np.array([self.board[row, col]]), np.array([color.value]))
+        self.board[row, col] = color.value
+
+    def toggle(self, row: int, col: int) -> Color:
+        """
+        White cells become black, the rest become white. Return the new color.
+        """
+        self.set_color(row, col, Color.BLACK if self.board[row, col] == WHITE else Color.WHITE)
+        return self.get_color(row, col)
+
+    def clear(self):
+        self.board[:] = WHITE
+        self.generation = 0
+        self.hash = 0
+
+    def step(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Move to the next generation, return the rows and the columns of the cells that changed.
+        """
+        new_board = step(self.board)
+        changed = np.nonzero(new_board != self.board)
+        self.recolor(*changed, self.board[changed], new_board[changed])
+        self.board = new_board
+        self.generation += 1
+        return changed
+
+    def is_stable(self) -> bool:
+        """
+        True if the board is known not to change any more, CrossEliminator only finds out by stepping.
+        """
+        return False
+
+    def cycle_step(self, detector: CycleDetector) -> Tuple[int, int]:
+        """
+        Step, unless the board is known to be stable, and look for a cycle with detector.
+        Return the generation the cycle starts at and its period, 1 for a fixed point,
+        or the generation and 0 if there is no cycle yet.
+        """
+        if self.is_stable():
+            return self.generation, 1
+        if not len(self.step()[0]):
+            return self.generation - 1, 1
+        period = detector.add_hash(self.hash, self.generation)
+        return self.generation - period, period
+
+    def run_to_convergence(self, max_steps: int, history_size: int = HISTORY_SIZE) -> Tuple[int, int]:
+        """
+        Step until the board reaches a fixed point or repeats one of its last history_size generations, up to max_steps.
+        Return like cycle_step.
+        """
+        detector = CycleDetector(history_size)
+        detector.add_hash(self.hash, self.generation)
+        last = self.generation + max_steps
+        while self.generation < last:
+            start, period = self.cycle_step(detector)
+            if period:
+                return start, period
+        return self.generation, 0
+
+    def run(self, steps: int) -> int:
+        """
+        Run up to steps generations, stop early when a generation changes nothing.
+        Return the number of generations that were run.
+        """
+        for i in range(steps):
+            if not len(self.step()[0]):
+                return i + 1
+        return steps
+
+    def changes(self, changed: Tuple[np.ndarray, np.ndarray]):
+        """
+        [row, col, new color] of every changed cell, like CellGrid.update_board.
+        """
+        return [[row, col, self.get_color(row, col)] for row, col in zip(*changed)]
+
+
+class IncrementalEliminator(CrossEliminator):
+    """
+    CrossEliminator that only looks at its frontier, the cells that can still change.
+    A cell changes only if a cell of its neighborhood changed in the last generation, and white and green cells never change,
+    so the frontier is the black, purple and blue cells next to the cells that changed, and is empty at a fixed point.
+    The board is a view of a board padded by OUTSIDE cells, the frontier keeps flat indices of the padded board.
+    """
+    def __init__(self, rows: int = None, cols: int = None, board: np.ndarray = None):
+        super().__init__(rows, cols, board)
+        self.padded = np.pad(self.board, 1, constant_values=OUTSIDE)
+        self.board = self.padded[1:-1, 1:-1]
+        self.flat = self.padded.reshape(-1)
+        self.width = self.cols + 2
+        #north, east, south, west, in the order of the TABLE index
+        self.offsets = [-self.width, 1, self.width, -1]
+        self.frontier = np.flatnonzero(UNSTABLE[self.flat])
+
+    def around(self, cells: np.ndarray) -> np.ndarray:
+        """
+        The unstable cells among cells and their neighbors, sorted.
+        Many cells are marked on a mask of the whole board, sorting them would cost more.
+        """
+        if len(cells) * DENSE_FRONTIER > len(self.flat):
+            near = np.zeros(len(self.flat), dtype=bool)
+            near[cells] = True
+            for offset in self.offsets:
+                near[cells + offset] = True
+            return np.flatnonzero(near & UNSTABLE[self.flat])
+        near = np.unique(np.concatenate([cells] + [cells + offset for offset in self.offsets]))
+        return near[UNSTABLE[self.flat[near]]]
+
+    def set_color(self, row: int, col: int, color: Color):
+        super().set_color(row, col, color)
+        cell = (row + 1) * self.width + col + 1
+        self.frontier = np.union1d(self.frontier, self.around(np.array([cell])))
+
+    def clear(self):
+        super().clear()
+        self.frontier = np.zeros(0, dtype=np.int64)
+
+    def is_stable(self) -> bool:
+        return len(self.frontier) == 0
+
+    def step(self) -> Tuple[np.ndarray, np.ndarray]:
+        cells = self.frontier
+        old = self.flat[cells]
+        index = old.astype(np.uint16)
+        for offset in self.offsets:
+            index *= NUM_OF_CODES
+            index += self.flat[cells + offset]
+        new = TABLE[index]
+        changed = new != old
+        cells = cells[changed]
+        self.flat[cells] = new[changed]
+        self.frontier = self.around(cells)
+        self.generation += 1
+        rows, cols = cells // self.width - 1, cells % self.width - 1
+        self.recolor(rows, cols, old[changed], new[changed])
+        return rows, cols
+
+
+class BatchEliminator:
+    """
+    Many boards of the same size, stepped together as one (boards, rows, cols) array.
+    A board is done once it reaches a fixed point or a cycle, and only the boards that are not done are stepped.
+    generations, starts and periods of every board are like CrossEliminator.generation and run_to_convergence.
+    history_size - generations remembered to find cycles, 0 to find only fixed points, which is cheaper
+    """
+    def __init__(self, boards: np.ndarray, history_size: int = HISTORY_SIZE):
+        self.boards = boards.astype(np.uint8)
+        self.done = np.zeros(len(boards), dtype=bool)
+        self.generations = np.zeros(len(boards), dtype=np.int64)
+        self.starts = np.zeros(len(boards), dtype=np.int64)
+        self.periods = np.zeros(len(boards), dtype=np.int64)
+        self.generation = 0
+        self.detectors = [CycleDetector(history_size) for board in boards] if history_size else None
+        if self.detectors:
+            for detector, board in zip(self.detectors, self.boards):
+                detector.add(board, 0)
+
+    def step(self) -> int:
+        """
+        Step the boards that are not done. Return the number of boards that are still running.
+        """
+        active = np.flatnonzero(~self.done)
+        boards = self.boards if len(active) == len(self.boards) else self.boards[active]
+        new_boards = step(boards)
+        changed = (new_boards != boards).reshape(len(active), -1).any(axis=1)
+        self.generation += 1
+        self.generations[active] += 1
+        fixed = active[~changed]
+        self.done[fixed] = True
+        self.starts[fixed] = self.generation - 1
+        self.periods[fixed] = 1
+        moved = active[changed]
+        self.boards[moved] = new_boards[changed]
+        if self.detectors:
+            for index in moved:
+                period = self.detectors[index].add(self.boards[index], self.generation)
+                if period:
+                    self.done[index] = True
+                    self.starts[index] = self.generation - period
+                    self.periods[index] = period
+        return len(active) - int(self.done[active].sum())
+
+    def run_to_convergence(self, max_steps: int) -> int:
+        """
+        Step until every board is done, up to max_steps. Return the number of boards that are still running.
+        """
+        running = int((~self.done).sum())
+        for i in range(max_steps):
+            if not running:
+                break
+            running = self.step()
+        self.starts[~self.done] = self.generations[~self.done]
+        return running
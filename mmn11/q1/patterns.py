@@ -0,0 +1,86 @@
+import argparse
+from typing import Dict, Tuple
+import numpy as np
+from engine import *
+
+SIZES = [20, 50, 100]
+COUNT = 1000
+#the smallest board with room for arms of two lengths
+MIN_SIZE = 5
+
+
+def draw_cross(board: np.ndarray, row: int, col: int, up: int, down: int, left: int, right: int):
+    board[row-up:row+down+1, col] = BLACK
+    board[row, col-left:col+right+1] = BLACK
+
+def generate_patterns(count: int, rows: int, cols: int, symmetric: float = 0.5, noise: float = 0.0,
+                      max_arm: int = None, rng = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    count boards with one black cross each, at a random position.
+    A symmetric cross has four arms of the same length, the arms of the others are drawn independently.
+    symmetric - the fraction of symmetric crosses
+    noise - the chance of every other cell to be black
+    Return the boards, a (count, rows, cols) array of color codes, and whether each cross is symmetric.
+    Raise ValueError if max_arm is below 2, a non symmetric cross needs arms of two lengths, or the arms do not fit the board.
+    """
+    rng = np.random.default_rng(rng)
+    max_arm = max_arm or (min(rows, cols) - 1) // 2
+    if max_arm < 2 or 2 * max_arm + 1 > min(rows, cols):
+        raise ValueError(f"a {rows}x{cols} board has no room for crosses with arms of 1 to {max_arm}, boards of at least {MIN_SIZE}x{MIN_SIZE} do")
+    boards = np.zeros((count, rows, cols), dtype=np.uint8)
+    if noise:
+        boards[rng.random(boards.shape) < noise] = BLACK
+    labels = rng.random(count) < symmetric
+    for board, label in zip(boards, labels):
+        if label:
+            arms = [int(rng.integers(1, max_arm, endpoint=True))] * 4
+        else:
+            arms = rng.integers(1, max_arm, size=4, endpoint=True).tolist()
+            while len(set(arms)) == 1:
+                arms = rng.integers(1, max_arm, size=4, endpoint=True).tolist()
+        up, down, left, right = arms
+        draw_cross(board, int(rng.integers(up, rows - down)), int(rng.integers(left, cols - right)), up, down, left, right)
+    return boards, labels
+
+def save_patterns(path: str, patterns: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]]):
+    """
+    Write boards of black and white cells, 1 bit a cell, with their labels, in one .npz for all the board sizes.
+    """
+    arrays = {}
+    for (rows, cols), (boards, labels) in patterns.items():
+        arrays[f"bits_{rows}x{cols}"] = np.packbits(boards == BLACK, axis=-1)
+        arrays[f"labels_{rows}x{cols}"] = labels
+    np.savez_compressed(path, **arrays)
+
+def load_patterns(path: str) -> Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]]:
+    patterns = {}
+    with np.load(path) as arrays:
+        for key in arrays.files:
+            if not key.startswith("bits_"):
+                continue
+            size = key[len("bits_"):]
+            rows, cols = (int(length) for length in size.split("x"))
+            bits = np.unpackbits(arrays[key], axis=-1, count=cols)
+            patterns[(rows, cols)] = (bits * np.uint8(BLACK), arrays[f"labels_{size}"])
+    return patterns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate boards of symmetric and non symmetric crosses")
+    parser.add_argument("output", help=".npz file of the patterns")
+    parser.add_argument("--count", type=int, default=COUNT, help="boards of every size")
+    parser.add_argument("--sizes", nargs="*", type=int, default=SIZES, help="boards are size x size")
+    parser.add_argument("--symmetric", type=float, default=0.5, help="fraction of symmetric crosses")
+    parser.add_argument("--noise", type=float, default=0.0, help="chance of every other cell to be black")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    if any(size < MIN_SIZE for size in args.sizes):
+        parser.error(f"--sizes must be at least {MIN_SIZE}, a non symmetric cross needs arms of two lengths")
+
+    rng = np.random.default_rng(args.seed)
+    save_patterns(args.output, {(size, size): generate_patterns(args.count, size, size, args.symmetric, args.noise, rng=rng)
+                                for size in args.sizes})
+
+
+if __name__ == "__main__":
+    main()
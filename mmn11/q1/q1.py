@@ -1,26 +1,11 @@
 import tkinter as tk
-from enum import Enum
+import numpy as np
+from engine import IncrementalEliminator, CycleDetector
 
-class Color(Enum):
-    WHITE = 0
-    BLACK = 1
-    GREEN = 2
-    PURPLE = 3
-    BLUE = 4
-
-rules = [
-    [[Color.BLACK, Color.WHITE, Color.WHITE, Color.WHITE, Color.WHITE], Color.WHITE],
-    [[Color.BLACK, Color.BLACK, Color.WHITE, Color.WHITE, Color.BLACK], Color.WHITE],
-    [[Color.BLACK, Color.WHITE, Color.BLACK, Color.WHITE, Color.WHITE], Color.PURPLE],
-    [[Color.BLACK, Color.WHITE, Color.BLACK, Color.WHITE, Color.PURPLE], Color.PURPLE],
-    [[Color.BLACK, Color.WHITE, Color.WHITE, Color.BLACK, Color.WHITE], Color.PURPLE],
-    [[Color.BLACK, Color.PURPLE, Color.WHITE, Color.BLACK, Color.WHITE], Color.PURPLE],
-    [[Color.BLACK, Color.BLACK, Color.WHITE, Color.WHITE, Color.WHITE], Color.BLUE],
-    [[Color.BLACK, Color.BLACK, Color.WHITE, Color.BLUE, Color.WHITE], Color.BLUE],
-    [[Color.BLACK, Color.WHITE, Color.BLUE, Color.WHITE, Color.BLACK], Color.BLUE],
-    [[Color.BLACK, Color.WHITE, Color.WHITE, Color.WHITE, Color.BLACK], Color.BLUE],
-    [[Color.BLACK, Color.PURPLE, Color.BLUE, Color.BLUE, Color.PURPLE], Color.GREEN]
-]
+#fill of every color code
+FILLS = ["white", "black", "green", "purple", "blue"]
+#milliseconds between the generations of a run
+RUN_DELAY = 50
 
 
 class CellGrid(tk.Tk):
@@ -33,7 +18,10 @@ class CellGrid(tk.Tk):
         self.cell_size = cell_size
         
         self.cells = [[None for _ in range(cols)] for _ in range(rows)]
-        self.colors = [[Color.WHITE for _ in range(cols)] for _ in range(rows)]  
+        self.eliminator = IncrementalEliminator(rows, cols)
+        self.running = False
+        #the colors on the canvas, only cells that differ from the board are drawn
+        self.drawn = self.eliminator.board.copy()
 
         self.canvas = tk.Canvas(self, width=cols * cell_size, height=rows * cell_size)
         self.canvas.pack()
@@ -45,6 +33,15 @@ class CellGrid(tk.Tk):
         clear_button.grid(row=0, column=0, padx=5)
         start_button = tk.Button(button_frame, text="Step", command=self.step)
         start_button.grid(row=0, column=1, padx=5)
+        run_button = tk.Button(button_frame, text="Run", command=self.run)
+        run_button.grid(row=0, column=2, padx=5)
+        label = tk.Label(button_frame, text="Draw Every: ")
+        label.grid(row=0, column=3, padx=5)
+        self.draw_every = tk.Entry(button_frame, width=5)
+        self.draw_every.insert(0, "1")
+        self.draw_every.grid(row=0, column=4, padx=5)
+        self.status = tk.Label(button_frame, text="")
+        self.status.grid(row=1, column=0, columnspan=5)
         self.create_grid()
         
     def create_grid(self):
@@ -60,74 +57,57 @@ class CellGrid(tk.Tk):
                 self.canvas.tag_bind(cell, "<Button-1>", lambda event, r=row, c=col: self.toggle_cell(r, c))
 
     def clear_grid(self):
-        for row in range(self.rows):
-            for col in range(self.cols):
-                self.canvas.itemconfig(self.cells[row][col], fill="white")
-                self.colors[row][col] = Color.WHITE
+        self.eliminator.clear()
+        self.update_colors()
 
-    def check_von_neumann(self, row, col):
-        for rule, result in rules:
-            if self.colors[row][col]==rule[0] and (row==0 or self.colors[row-1][col]==rule[1]) and (col==self.cols-1 or self.colors[row][col+1]==rule[2]) and (row==self.rows-1 or self.colors[row+1][col]==rule[3]) and (col==0 or self.colors[row][col-1]==rule[4]):
-                return result
-        return -1
-
-    def has_neighbor(self, row, col, color):
-        if (row>0 and self.colors[row-1][col]==color) or (row<self.rows-1 and self.colors[row+1][col]==color) or (col>0 and self.colors[row][col-1]==color) or (col<self.cols-1 and self.colors[row][col+1]==color):
-            return True
-        return False
-    
     def step(self):
-        self.update_colors(self.update_board())
-
-    def update_board(self):
-        to_color = []
-        for row in range(self.rows):
-            for col in range(self.cols):
-                cur_color = self.colors[row][col]
-                if cur_color!=Color.WHITE and cur_color!=Color.GREEN: #white and green are stable states
-                    if self.has_neighbor(row, col, Color.GREEN): #if cell has green neighbor it becomes green
-                        new_color = Color.GREEN
-                    #blue and purple can't be neighbors - move into SELF DESTRUCTION    
-                    elif cur_color == Color.PURPLE and self.has_neighbor(row, col, Color.BLUE) or cur_color == Color.BLUE and self.has_neighbor(row, col, Color.PURPLE):
-                        new_color = Color.WHITE
-                    #check rules    
-                    else:
-                        new_color = self.check_von_neumann(row, col)
-                    if new_color==-1 and cur_color==Color.BLACK and (self.has_neighbor(row, col, Color.PURPLE) or self.has_neighbor(row, col, Color.BLUE)):
-                        new_color = Color.WHITE
-                    if new_color==-1 and cur_color == Color.PURPLE and ((row<self.rows-1 and self.colors[row+1][col]==Color.WHITE) and (col<self.cols-1 and self.colors[row][col+1]==Color.WHITE)):
-                        new_color = Color.WHITE 
-                    if new_color==-1 and cur_color == Color.BLUE and ((row>0 and self.colors[row-1][col]==Color.WHITE) and (col>0 and self.colors[row][col-1]==Color.WHITE)):
-                        new_color = Color.WHITE     
-                    if new_color != -1:
-                        to_color.append([row, col, new_color])
-        
-        return to_color
-    
-    
-    def update_colors(self, to_color):
-        for row, col, new_color in to_color:
-            self.colors[row][col] = new_color                
-            match new_color:
-                case Color.WHITE:
-                    self.canvas.itemconfig(self.cells[row][col], fill="white")
-                case Color.GREEN:
-                    self.canvas.itemconfig(self.cells[row][col], fill="green")
-                case Color.BLUE:
-                    self.canvas.itemconfig(self.cells[row][col], fill="blue") 
-                case Color.PURPLE:
-                    self.canvas.itemconfig(self.cells[row][col], fill="purple")            
+        self.eliminator.step()
+        self.update_colors()
+
+    def run(self):
+        """
+        Step until the board reaches a fixed point or a cycle, drawing every "Draw Every" generations and the last one.
+        A press while a run is going is ignored, it would step the board twice a generation.
+        """
+        if self.running:
+            return
+        try:
+            draw_every = max(int(self.draw_every.get()), 1)
+        except ValueError:
+            draw_every = 1
+        detector = CycleDetector()
+        detector.add_hash(self.eliminator.hash, self.eliminator.generation)
+        self.status.config(text="Running")
+        self.running = True
+        self.run_step(detector, draw_every)
+
+    def run_step(self, detector, draw_every):
+        start, period = self.eliminator.cycle_step(detector)
+        if period or self.eliminator.generation % draw_every == 0:
+            self.update_colors()
+        if period == 1:
+            self.status.config(text=f"Fixed point from generation {start}")
+        elif period:
+            self.status.config(text=f"Cycle of period {period} from generation {start}")
+        else:
+            self.after(RUN_DELAY, self.run_step, detector, draw_every)
+            return
+        self.running = False
+
+    def update_colors(self):
+        """
+        Draw the cells whose color changed since they were last drawn.
+        """
+        board = self.eliminator.board
+        for row, col in zip(*np.nonzero(board != self.drawn)):
+            self.canvas.itemconfig(self.cells[row][col], fill=FILLS[board[row, col]])
+        self.drawn[:] = board
         self.canvas.update_idletasks()
 
-
-
     def toggle_cell(self, row, col):
-        if self.colors[row][col] == Color.WHITE:
-            self.canvas.itemconfig(self.cells[row][col], fill="black")
-            self.colors[row][col] = Color.BLACK
-        else:
-            self.canvas.itemconfig(self.cells[row][col], fill="white")
-            self.colors[row][col] = Color.WHITE
+        self.eliminator.toggle(row, col)
+        self.update_colors()
 
-grid = CellGrid(20, 20, cell_size=20)
-grid.mainloop()
+if __name__ == "__main__":
+    grid = CellGrid(20, 20, cell_size=20)
+    grid.mainloop()
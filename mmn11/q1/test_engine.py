@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from engine import *
+
+
+class ReferenceGrid:
+    """
+    The rules of the original CellGrid.update_board, on Color objects and without the canvas.
+    """
+    def __init__(self, board: np.ndarray):
+        self.rows, self.cols = board.shape
+        self.colors = to_colors(board)
+
+    def check_von_neumann(self, row, col):
+        for rule, result in rules:
+            if self.colors[row][col]==rule[0] and (row==0 or self.colors[row-1][col]==rule[1]) and (col==self.cols-1 or self.colors[row][col+1]==rule[2]) and (row==self.rows-1 or self.colors[row+1][col]==rule[3]) and (col==0 or self.colors[row][col-1]==rule[4]):
+                return result
+        return -1
+
+    def has_neighbor(self, row, col, color):
+        if (row>0 and self.colors[row-1][col]==color) or (row<self.rows-1 and self.colors[row+1][col]==color) or (col>0 and self.colors[row][col-1]==color) or (col<self.cols-1 and self.colors[row][col+1]==color):
+            return True
+        return False
+
+    def update_board(self):
+        to_color = []
+        for row in range(self.rows):
+            for col in range(self.cols):
+                cur_color = self.colors[row][col]
+                if cur_color!=Color.WHITE and cur_color!=Color.GREEN:
+                    if self.has_neighbor(row, col, Color.GREEN):
+                        new_color = Color.GREEN
+                    elif cur_color == Color.PURPLE and self.has_neighbor(row, col, Color.BLUE) or cur_color == Color.BLUE and self.has_neighbor(row, col, Color.PURPLE):
+                        new_color = Color.WHITE
+                    else:
+                        new_color = self.check_von_neumann(row, col)
+                    if new_color==-1 and cur_color==Color.BLACK and (self.has_neighbor(row, col, Color.PURPLE) or self.has_neighbor(row, col, Color.BLUE)):
+                        new_color = Color.WHITE
+                    if new_color==-1 and cur_color == Color.PURPLE and ((row<self.rows-1 and self.colors[row+1][col]==Color.WHITE) and (col<self.cols-1 and self.colors[row][col+1]==Color.WHITE)):
+                        new_color = Color.WHITE
+                    if new_color==-1 and cur_color == Color.BLUE and ((row>0 and self.colors[row-1][col]==Color.WHITE) and (col>0 and self.colors[row][col-1]==Color.WHITE)):
+                        new_color = Color.WHITE
+                    if new_color != -1:
+                        to_color.append([row, col, new_color])
+        return to_color
+
+    def step(self):
+        for row, col, new_color in self.update_board():
+            self.colors[row][col] = new_color
+
+
+def random_boards(count: int, seed: int):
+    """
+    Boards of random sizes and color mixes, all the colors on most of them.
+    """
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        rows, cols = rng.integers(1, 12, 2)
+        weights = rng.random(len(Color))
+        yield rng.choice(len(Color), (rows, cols), p=weights / weights.sum()).astype(np.uint8)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_step_matches_update_board(seed):
+    for board in random_boards(100, seed):
+        reference = ReferenceGrid(board)
+        for generation in range(4):
+            reference.step()
+            board = step(board)
+            assert (to_board(reference.colors) == board).all()
+
+def test_changes_match_update_board():
+    for board in random_boards(100, 3):
+        eliminator = CrossEliminator(board=board)
+        assert eliminator.changes(eliminator.step()) == ReferenceGrid(board).update_board()
+
+def test_incremental_matches_cross_eliminator():
+    for board in random_boards(100, 4):
+        eliminator, incremental = CrossEliminator(board=board), IncrementalEliminator(board=board)
+        for generation in range(10):
+            changed = eliminator.step()
+            assert sorted(zip(*changed)) == sorted(zip(*incremental.step()))
+            assert (eliminator.board == incremental.board).all()
+            assert eliminator.hash == incremental.hash == board_hash(eliminator.board)
+
+@pytest.mark.parametrize("history_size", [HISTORY_SIZE, 0])
+def test_batch_matches_run_to_convergence(history_size):
+    rng = np.random.default_rng(5)
+    for trial in range(10):
+        rows, cols = rng.integers(1, 15, 2)
+        boards = rng.choice(len(Color), (30, rows, cols), p=[0.5, 0.3, 0.05, 0.1, 0.05]).astype(np.uint8)
+        batch = BatchEliminator(boards, history_size)
+        batch.run_to_convergence(30)
+        for index, board in enumerate(boards):
+            eliminator = CrossEliminator(board=board)
+            start, period = eliminator.run_to_convergence(30, history_size or HISTORY_SIZE)
+            assert (eliminator.board == batch.boards[index]).all()
+            assert (eliminator.generation, start, period) == (batch.generations[index], batch.starts[index], batch.periods[index])
@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+from climate import Climate, STATE
+from measures import FIELDS, FIELD_TITLES
+from worlds import add_world_arguments, world_from_args, save_world
+
+EVERY = 30
+DAYS = 365
+META = "meta.json"
+DAY_FILE = "day.dat"
+RNG_FILE = "rng.jsonl"
+
+
+class Checkpoints:
+   """
+   Snapshots of a Climate in a directory, every field in its own append-only file of (snapshots, rows, cols) records,
+   read back through memory maps.
+   day.dat is the time index, the day of every snapshot, and rng.jsonl the state of the random numbers after it,
+   so a run restored from a snapshot goes on exactly as the run that wrote it.
+   The day of a snapshot is written last, a snapshot cut off in the middle is dropped when the directory is opened.
+   Days only go forward, replay looks them up in order.
+   """
+   def __init__(self, directory: str, rows: int = None, cols: int = None):
+      self.directory = directory
+      meta_path = os.path.join(directory, META)
+      if os.path.exists(meta_path):
+         with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+         if rows is not None and (rows, cols) != (meta["rows"], meta["cols"]):
+            raise ValueError(f"{directory} holds {meta['rows']}x{meta['cols']} snapshots, not {rows}x{cols}")
+      elif rows is None:
+         raise FileNotFoundError(f"no snapshots in {directory}")
+      else:
+         os.makedirs(directory, exist_ok=True)
+         example = Climate.default()
+         meta = {"rows": rows, "cols": cols, "dtypes": {name: getattr(example, name).dtype.str for name in STATE}}
+         with open(meta_path, "w") as meta_file:
+            json.dump(meta, meta_file)
+      self.rows, self.cols = meta["rows"], meta["cols"]
+      self.dtypes = {name: np.dtype(dtype) for name, dtype in meta["dtypes"].items()}
+      self.count = self.file_size(DAY_FILE) // 8
+      self.truncate()
+      self.last_day = int(self.days()[-1]) if self.count else None
+
+   def path(self, name: str) -> str:
+      return os.path.join(self.directory, name)
+
+   def file_size(self, name: str) -> int:
+      return os.path.getsize(self.path(name)) if os.path.exists(self.path(name)) else 0
+
+   def truncate(self):
+      """
+      Drop what was written of a snapshot after the last whole one.
+      """
+      for name in STATE:
+         record = self.rows * self.cols * self.dtypes[name].itemsize
+         if self.file_size(f"{name}.dat") > self.count * record:
+            os.truncate(self.path(f"{name}.dat"), self.count * record)
+      if self.file_size(DAY_FILE) > self.count * 8:
+         os.truncate(self.path(DAY_FILE), self.count * 8)
+      if os.path.exists(self.path(RNG_FILE)):
+         with open(self.path(RNG_FILE)) as rng_file:
+            lines = rng_file.readlines()[:self.count]
+         with open(self.path(RNG_FILE), "w") as rng_file:
+            rng_file.writelines(lines)
+
+   def __len__(self) -> int:
+      return self.count
+
+   def append(self, climate: Climate):
+      if climate.types.shape != (self.rows, self.cols):
+         raise ValueError(f"a {climate.rows}x{climate.cols} world in {self.rows}x{self.cols} snapshots")
+      if self.last_day is not None and climate.day <= self.last_day:
+         raise ValueError(f"a snapshot of day {climate.day} after one of day {self.last_day} in {self.directory}")
+      for name in STATE:
+         with open(self.path(f"{name}.dat"), "ab") as field_file:
+            field_file.write(np.ascontiguousarray(getattr(climate, name), dtype=self.dtypes[name]).tobytes())
+      with open(self.path(RNG_FILE), "a") as rng_file:
+         rng_file.write(json.dumps(climate.rng.bit_generator.state) + "\n")
+      with open(self.path(DAY_FILE), "ab") as day_file:
+         day_file.write(np.int64(climate.day).tobytes())
+      self.count += 1
+      self.last_day = climate.day
+
+   def days(self) -> np.ndarray:
+      return np.fromfile(self.path(DAY_FILE), dtype=np.int64, count=self.count) if self.count else np.zeros(0, dtype=np.int64)
+
+   def field(self, name: str) -> np.ndarray:
+      """
+      The snapshots of a field, a read only (snapshots, rows, cols) memory map.
+      """
+      if not self.count:
+         return np.zeros((0, self.rows, self.cols), dtype=self.dtypes[name])
+      return np.memmap(self.path(f"{name}.dat"), dtype=self.dtypes[name], mode="r", shape=(self.count, self.rows, self.cols))
+
+   def restore(self, index: int = -1) -> Climate:
+      """
+      The world of a snapshot, the last by default, its random numbers going on from where they were.
+      """
+      index = range(self.count)[index]
+      climate = Climate(*(np.array(self.field(name)[index]) for name in STATE))
+      with open(self.path(RNG_FILE)) as rng_file:
+         for line_index, line in enumerate(rng_file):
+            if line_index == index:
+               climate.rng.bit_generator.state = json.loads(line)
+               break
+      climate.day = int(self.days()[index])
+      return climate
+
+   def replay(self, day: int) -> Climate:
+      """
+      The world of a day, from the last snapshot before it, run forward to it.
+      """
+      days = self.days()
+      index = np.searchsorted(days, day, side="right") - 1
+      if index < 0:
+         raise ValueError(f"no snapshot before day {day}, the first is of day {days[0] if len(days) else None}")
+      climate = self.restore(index)
+      climate.run(day - climate.day)
+      return climate
+
+
+def snapshot_every(checkpoints: Checkpoints, every: int = EVERY):
+   """
+   A function of a climate that snapshots it on every every day, for measure.
+   """
+   if every < 1:
+      raise ValueError(f"snapshots must be at least a day apart, not {every}")
+   def snapshot(climate: Climate):
+      if climate.day % every == 0:
+         checkpoints.append(climate)
+   return snapshot
+
+def run_with_checkpoints(climate: Climate, days: int, checkpoints: Checkpoints, every: int = EVERY):
+   """
+   Run climate until day days, snapshotting it every every days, and on the last day.
+   """
+   if every < 1:
+      raise ValueError(f"snapshots must be at least a day apart, not {every}")
+   if not len(checkpoints) or checkpoints.days()[-1] != climate.day:
+      checkpoints.append(climate)
+   while climate.day < days:
+      climate.run(min(every - climate.day % every, days - climate.day))
+      checkpoints.append(climate)
+
+def render(climate: Climate, path: str):
+   """
+   The fields of climate side by side, to path.
+   """
+   fig, axes = plt.subplots(1, len(FIELDS), figsize=(5 * len(FIELDS), 5))
+   for axis, field in zip(axes, FIELDS):
+      image = axis.imshow(getattr(climate, field))
+      axis.set_title(f"{FIELD_TITLES[field]}, Day {climate.day}")
+      fig.colorbar(image, ax=axis, shrink=0.7)
+   plt.tight_layout()
+   fig.savefig(path)
+   plt.close(fig)
+
+
+def main():
+   parser = argparse.ArgumentParser(description="Run the climate with snapshots, resuming from the last one, or replay a day of them")
+   parser.add_argument("directory", help="directory of the snapshots")
+   parser.add_argument("--days", type=int, default=DAYS, help="run until this day")
+   parser.add_argument("--every", type=int, default=EVERY, help="days between snapshots")
+   parser.add_argument("--replay", type=int, default=None, metavar="DAY", help="replay this day instead of running")
+   parser.add_argument("--render", default=None, help="draw the fields of the day replayed to this image")
+   parser.add_argument("--export", default=None, help="write the world of the day replayed to this .npz, for q2.py")
+   add_world_arguments(parser)
+   parser.add_argument("--seed", type=int, default=None)
+   args = parser.parse_args()
+   if args.every < 1:
+      parser.error("--every must be at least 1")
+
+   if args.replay is not None:
+      plt.switch_backend("Agg")
+      climate = Checkpoints(args.directory).replay(args.replay)
+      if args.render:
+         render(climate, args.render)
+      if args.export:
+         save_world(args.export, climate)
+      print(f"day {climate.day}: " + ", ".join(f"{FIELD_TITLES[field]} {getattr(climate, field).mean():.3f}" for field in FIELDS))
+      return
+   if os.path.exists(os.path.join(args.directory, META)):
+      checkpoints = Checkpoints(args.directory)
+      climate = checkpoints.restore()
+      print(f"resuming from day {climate.day}")
+   else:
+      climate = world_from_args(args, args.seed)
+      checkpoints = Checkpoints(args.directory, climate.rows, climate.cols)
+   run_with_checkpoints(climate, args.days, checkpoints, args.every)
+   print(f"{len(checkpoints)} snapshots, the last of day {climate.day}")
+
+
+if __name__ == "__main__":
+   main()
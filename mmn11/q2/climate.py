@@ -0,0 +1,176 @@
+from typing import List
+import numpy as np
+from q2 import (cell_types, clouds_probs, rain_probs, wind_probs, directions, pollution_levels, EnvironmentCell, Wind,
+                CITY_POLLUTION_PRODUCE, MAX_WIND_POWER, MIN_WIND_POWER, MID_WIND_POWER, MAX_POLLUTION_LEVEL,
+                MIN_POLLUTION_LEVEL, MID_POLLUTION_LEVEL, MAX_TEMP, MIN_TEMP, MAX_CLOUD, MIN_CLOUD, MID_CLOUD, default_cells)
+
+# the values of power(), as codes
+NONE, WEAK, STRONG = 0, 1, 2
+# direction codes, "-" is 0, the directions follow in the order of q2.directions
+DIRECTIONS = ["-"] + list(directions)
+DIRECTION_X = np.array([0] + [dx for dx, dy in directions.values()], dtype=np.int16)
+DIRECTION_Y = np.array([0] + [dy for dx, dy in directions.values()], dtype=np.int16)
+# code of the direction of a wind by (sign of y + 1) * 3 + sign of x + 1
+DIRECTION_BY_SIGNS = np.zeros(9, dtype=np.uint8)
+for code, (dx, dy) in enumerate(directions.values(), 1):
+   DIRECTION_BY_SIGNS[(dy + 1) * 3 + dx + 1] = code
+# get_neighbors, by the power of the value carried and the power of the wind carrying it
+NEIGHBOR_SHARE = np.array([[0, 0, 0], [0, 0, 0.01], [0.01, 0.01, 0.2]])
+# the directions of winds that bring things into a cell, in the order TheWorld adds them,
+# so the floating point sums are the same
+INFLOW_ORDER = ["south", "south_east", "south_west", "north", "north_east", "north_west", "east", "west"]
+# TheWorld takes the power of a south east wind from the cell above the cell it blows to,
+# that is the cell east of the cell it blows from
+EAST_CARRIER = {"south_east"}
+CLOUDS_PROBS = np.array([clouds_probs[cell_type] for cell_type in cell_types])
+WIND_PROBS = np.array([wind_probs[cell_type] for cell_type in cell_types])
+CITY_PRODUCE = np.array([CITY_POLLUTION_PRODUCE if cell_type == "City" else 0 for cell_type in cell_types])
+# what a cell loses by the power of its own wind
+WIND_CLOUDS_LOSS = np.array([0, 1, 2])
+WIND_POLLUTION_LOSS = np.array([0, 0.01, 0.02])
+WIND_TEMP_CHANGE = np.array([0.0002, 0, -0.0002])
+TEMP_RISE = np.array([{"A": 0, "B": 0.02, "C": 0.03, "D": 0.04, "E": 0.05}[level["level"]] for level in pollution_levels])
+# the signs of a random wind in x and y, by the quarter its direction draw falls in
+RANDOM_X = np.array([-1, 1, 0, 0], dtype=np.int16)
+RANDOM_Y = np.array([0, 0, -1, 1], dtype=np.int16)
+# random numbers every cell draws in a step: clouds, rain, wind change, wind direction and wind power
+NUM_OF_DRAWS = 5
+# the arrays that make the state of a Climate, in the order of its arguments
+STATE = ["types", "temp", "pollution", "clouds", "rain", "wind_power", "wind_direction"]
+
+
+def power_codes(values: np.ndarray, mid_value) -> np.ndarray:
+   """
+   power() of every value, for values that are not negative.
+   """
+   codes = (values > 0).astype(np.intp)
+   codes += values >= mid_value
+   return codes
+
+
+class Climate:
+   """
+   The world of TheWorld without a UI, every field of the cells is a NumPy array.
+   types - index in cell_types, wind_direction - index in DIRECTIONS
+   A step computes the eight inflows of every cell from shifted views of the fields, like TheWorld.update_world,
+   and draws the random numbers of all the cells at once.
+   rng - numpy Generator or seed
+   """
+   def __init__(self, types: np.ndarray, temp: np.ndarray, pollution: np.ndarray, clouds: np.ndarray, rain: np.ndarray,
+                wind_power: np.ndarray, wind_direction: np.ndarray, rng = None):
+      self.types = np.asarray(types, dtype=np.uint8)
+      self.temp = np.asarray(temp, dtype=np.float64)
+      self.pollution = np.asarray(pollution, dtype=np.float64)
+      self.clouds = np.asarray(clouds, dtype=np.float64)
+      self.rain = np.asarray(rain, dtype=bool)
+      self.wind_power = np.asarray(wind_power, dtype=np.int16)
+      self.wind_direction = np.asarray(wind_direction, dtype=np.uint8)
+      self.rows, self.cols = self.types.shape
+      self.rng = np.random.default_rng(rng)
+      self.day = 0
+
+   @classmethod
+   def from_cells(cls, cells: List[List[EnvironmentCell]], rng = None) -> "Climate":
+      def field(get):
+         return [[get(cell) for cell in row] for row in cells]
+      return cls(field(lambda cell: cell_types.index(cell.type)), field(lambda cell: cell.temp), field(lambda cell: cell.pollution_level),
+                 field(lambda cell: cell.clouds), field(lambda cell: cell.rain), field(lambda cell: cell.wind.power),
+                 field(lambda cell: DIRECTIONS.index(cell.wind.direction)), rng)
+
+   @classmethod
+   def default(cls, rng = None) -> "Climate":
+      return cls.from_cells(default_cells(), rng)
+
+   def copy(self, rng = None) -> "Climate":
+      """
+      The same world, that draws its random numbers from rng.
+      """
+      return Climate(*(getattr(self, name).copy() for name in STATE), rng)
+
+   def tiled(self, times: int, rng = None) -> "Climate":
+      """
+      The world repeated times x times.
+      """
+      return Climate(*(np.tile(getattr(self, name), (times, times)) for name in STATE), rng)
+
+   def to_cells(self) -> List[List[EnvironmentCell]]:
+      return [[EnvironmentCell(cell_types[self.types[row, col]], float(self.temp[row, col]),
+                               Wind(int(self.wind_power[row, col]), DIRECTIONS[self.wind_direction[row, col]]),
+                               float(self.pollution[row, col]), float(self.clouds[row, col]), bool(self.rain[row, col]))
+               for col in range(self.cols)] for row in range(self.rows)]
+
+   def step(self, draws: np.ndarray = None):
+      """
+      Move the world a day forward.
+      draws - (NUM_OF_DRAWS, rows, cols) uniform numbers to use instead of drawing them from rng
+      """
+      if draws is None:
+         draws = self.rng.random((NUM_OF_DRAWS, self.rows, self.cols))
+      cloud_draw, rain_draw, change_draw, direction_draw, power_draw = draws
+      # take() is fastest with intp indices
+      types, wind_direction = self.types.astype(np.intp), self.wind_direction.astype(np.intp)
+      rows, cols = self.rows, self.cols
+      wind_codes = power_codes(self.wind_power, MID_WIND_POWER)
+      # what every cell carries to the cell its wind blows to, computed once for the cell instead of once for every neighbor
+      east = np.pad(wind_codes, ((0, 0), (0, 1)))[:, 1:]
+      carried = {}
+      for name, codes in [("clouds", power_codes(self.clouds, MID_CLOUD)), ("pollution", power_codes(self.pollution, MID_POLLUTION_LEVEL))]:
+         carried[name] = np.pad(NEIGHBOR_SHARE.take(codes * 3 + wind_codes), 1)
+         carried[name + "_east"] = np.pad(NEIGHBOR_SHARE.take(codes * 3 + east), 1)
+      blowing_direction = np.pad(np.where(self.wind_power != 0, self.wind_direction, 0).astype(np.uint8), 1)
+      push = np.pad(self.wind_power - 1, 1)
+      def neighbor(padded, dr, dc):
+         return padded[1+dr:1+dr+rows, 1+dc:1+dc+cols]
+
+      # own wind, weakened by one
+      own_power = np.maximum(self.wind_power - 1, 0)
+      wind_x = own_power * DIRECTION_X.take(wind_direction)
+      wind_y = own_power * DIRECTION_Y.take(wind_direction)
+      clouds = self.clouds + (cloud_draw < CLOUDS_PROBS.take(types))
+      clouds -= WIND_CLOUDS_LOSS.take(wind_codes)
+      pollution = self.pollution + CITY_PRODUCE.take(types)
+      pollution -= WIND_POLLUTION_LOSS.take(wind_codes)
+      # a neighbor that does not blow into the cell adds an exact 0, so the sums are those of TheWorld
+      for direction in INFLOW_ORDER:
+         dx, dy = directions[direction]
+         dr, dc = -dy, -dx
+         blowing = neighbor(blowing_direction, dr, dc) == DIRECTIONS.index(direction)
+         suffix = "_east" if direction in EAST_CARRIER else ""
+         clouds += neighbor(carried["clouds" + suffix], dr, dc) * blowing
+         pollution += neighbor(carried["pollution" + suffix], dr, dc) * blowing
+         inflow = neighbor(push, dr, dc) * blowing
+         if dx:
+            wind_x += inflow * dx
+         if dy:
+            wind_y += inflow * dy
+      clouds -= self.rain
+      pollution -= self.rain * 0.05
+
+      temp = self.temp + TEMP_RISE.take(self.pollution.astype(np.intp))
+      temp += WIND_TEMP_CHANGE.take(wind_codes)
+      temp -= self.rain * 0.0002
+
+      # a calm cell may get a random wind
+      change = (wind_x == 0) & (wind_y == 0) & (change_draw < WIND_PROBS.take(types))
+      random_power = (power_draw * 10).astype(np.int16) * change
+      quarter = (direction_draw * 4).astype(np.intp)
+      wind_x += random_power * RANDOM_X.take(quarter)
+      wind_y += random_power * RANDOM_Y.take(quarter)
+      # the power of a diagonal wind is the weaker of its parts
+      abs_x, abs_y = np.abs(wind_x), np.abs(wind_y)
+      wind_power = np.minimum(abs_x, abs_y)
+      wind_power += np.maximum(abs_x, abs_y) * (wind_power == 0)
+
+      # rain depends on the clouds before the step, less one
+      clouds_left = self.clouds - 1
+      self.rain = (clouds_left > 0) & (rain_draw < np.where(clouds_left >= MID_CLOUD, rain_probs["Strong"], rain_probs["Weak"]))
+      self.temp = np.clip(temp, MIN_TEMP, MAX_TEMP)
+      self.pollution = np.clip(pollution, MIN_POLLUTION_LEVEL, MAX_POLLUTION_LEVEL)
+      self.clouds = np.clip(clouds, MIN_CLOUD, MAX_CLOUD)
+      self.wind_power = np.clip(wind_power, MIN_WIND_POWER, MAX_WIND_POWER)
+      self.wind_direction = DIRECTION_BY_SIGNS.take((np.sign(wind_y) * 3 + np.sign(wind_x) + 4).astype(np.intp))
+      self.day += 1
+
+   def run(self, days: int):
+      for day in range(days):
+         self.step()
@@ -0,0 +1,139 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import os
+from statistics import NormalDist
+from typing import Callable, Dict, Tuple
+import numpy as np
+import matplotlib.pyplot as plt
+from climate import Climate
+from measures import measure, FIELDS, FIELD_TITLES, DAYS
+from worlds import add_world_arguments, world_from_args
+
+MEMBERS = 100
+# confidence of the intervals and the bands
+LEVEL = 0.95
+
+
+def run_member(args) -> Tuple[int, Dict[str, np.ndarray]]:
+   """
+   Run one member of the ensemble, a copy of world with its own seed.
+   Return its index and the metrics of ClimateStats.arrays for every day.
+   """
+   index, world, seed, days = args
+   return index, measure(world.copy(np.random.default_rng(seed)), days, []).arrays()
+
+
+class Ensemble:
+   """
+   The metrics of every member of an ensemble, in (members, days + 1, ...) arrays by the names of ClimateStats.arrays.
+   """
+   def __init__(self, members: int, days: int):
+      self.metrics: Dict[str, np.ndarray] = {}
+      self.members = members
+      self.days = days
+      self.done = np.zeros(members, dtype=bool)
+
+   def add(self, index: int, arrays: Dict[str, np.ndarray]):
+      for name, values in arrays.items():
+         if name not in self.metrics:
+            self.metrics[name] = np.full((self.members,) + values.shape, np.nan)
+         self.metrics[name][index] = values
+      self.done[index] = True
+
+   def mean(self, name: str) -> np.ndarray:
+      return self.metrics[name][self.done].mean(axis=0)
+
+   def confidence(self, name: str, level: float = LEVEL) -> Tuple[np.ndarray, np.ndarray]:
+      """
+      The confidence interval of the mean of the members, by the normal approximation.
+      """
+      values = self.metrics[name][self.done]
+      error = NormalDist().inv_cdf(0.5 + level / 2) * values.std(axis=0, ddof=1) / np.sqrt(len(values))
+      mean = values.mean(axis=0)
+      return mean - error, mean + error
+
+   def band(self, name: str, level: float = LEVEL) -> Tuple[np.ndarray, np.ndarray]:
+      """
+      The range of the middle level of the members, day by day.
+      """
+      low, high = np.percentile(self.metrics[name][self.done], [50 * (1 - level), 50 * (1 + level)], axis=0)
+      return low, high
+
+   def save(self, path: str):
+      arrays = {"done": self.done}
+      for name, values in self.metrics.items():
+         low, high = self.confidence(name)
+         arrays[name] = values
+         arrays[f"{name}_ensemble_mean"] = self.mean(name)
+         arrays[f"{name}_ci_low"], arrays[f"{name}_ci_high"] = low, high
+         arrays[f"{name}_band_low"], arrays[f"{name}_band_high"] = self.band(name)
+      np.savez_compressed(path, **arrays)
+
+
+def run_ensemble(world: Climate, members: int = MEMBERS, days: int = DAYS, workers: int = None, seed: int = None,
+                 on_member: Callable[[int, Dict[str, np.ndarray]], None] = None) -> Ensemble:
+   """
+   Run members copies of world in a process pool, each with a seed spawned from seed.
+   The metrics of every member are added to the ensemble as it finishes, and passed to on_member.
+   At least two members are needed, the confidence interval of a single one is not defined.
+   """
+   if members < 2:
+      raise ValueError(f"an ensemble needs at least 2 members, not {members}")
+   ensemble = Ensemble(members, days)
+   seeds = np.random.SeedSequence(seed).spawn(members)
+   with ProcessPoolExecutor(workers) as executor:
+      futures = [executor.submit(run_member, (index, world, seeds[index], days)) for index in range(members)]
+      for future in as_completed(futures):
+         index, arrays = future.result()
+         ensemble.add(index, arrays)
+         if on_member:
+            on_member(index, arrays)
+   return ensemble
+
+def create_ensemble_plots(ensemble: Ensemble, path: str):
+   """
+   The mean of every field over the members, with its confidence interval and the band of the members, to path.
+   """
+   fig, axes = plt.subplots(len(FIELDS), 1, figsize=(12, 10))
+   days = np.arange(ensemble.days + 1)
+   for axis, field in zip(axes, FIELDS):
+      name = f"{field}_mean"
+      axis.fill_between(days, *ensemble.band(name), alpha=0.2, label=f"{LEVEL:.0%} of the members")
+      axis.fill_between(days, *ensemble.confidence(name), alpha=0.5, label=f"{LEVEL:.0%} confidence of the mean")
+      axis.plot(days, ensemble.mean(name), label="mean")
+      axis.set_title(f"{FIELD_TITLES[field]} of {ensemble.done.sum()} Runs")
+      axis.set_xlabel("Day")
+      axis.legend(loc="upper left")
+   plt.tight_layout(pad=4)
+   fig.savefig(path)
+   plt.close(fig)
+
+
+def main():
+   parser = argparse.ArgumentParser(description="Run many seeds of the climate in parallel, and write their means and bands")
+   parser.add_argument("--members", type=int, default=MEMBERS)
+   parser.add_argument("--days", type=int, default=DAYS)
+   add_world_arguments(parser)
+   parser.add_argument("--workers", type=int, default=None)
+   parser.add_argument("--seed", type=int, default=None)
+   parser.add_argument("--output-dir", default="ensemble")
+   args = parser.parse_args()
+   if args.members < 2:
+      parser.error("--members must be at least 2, the confidence interval of a single run is not defined")
+
+   plt.switch_backend("Agg")
+   world = world_from_args(args, args.seed)
+   def report(index, arrays):
+      print(f"run {index}: pollution {arrays['pollution_mean'][-1]:.3f}, temperature {arrays['temp_mean'][-1]:.3f}")
+   ensemble = run_ensemble(world, args.members, args.days, args.workers or os.cpu_count(), args.seed, report)
+   os.makedirs(args.output_dir, exist_ok=True)
+   ensemble.save(os.path.join(args.output_dir, "ensemble.npz"))
+   create_ensemble_plots(ensemble, os.path.join(args.output_dir, "ensemble.png"))
+   for field in FIELDS:
+      low, high = ensemble.confidence(f"{field}_mean")
+      print(f"{FIELD_TITLES[field]} after {args.days} days: {ensemble.mean(f'{field}_mean')[-1]:.3f}, "
+            f"{LEVEL:.0%} confidence [{low[-1]:.3f}, {high[-1]:.3f}]")
+
+
+if __name__ == "__main__":
+   main()
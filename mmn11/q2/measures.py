@@ -0,0 +1,135 @@
+import argparse
+import os
+from typing import Callable, Dict, List
+import numpy as np
+import matplotlib.pyplot as plt
+from q2 import cell_types, create_plots, normalize
+from climate import Climate
+from worlds import add_world_arguments, world_from_args
+
+# the fields measured, by the names of their arrays in Climate
+FIELDS = ["pollution", "temp", "clouds", "wind_power"]
+FIELD_TITLES = {"pollution": "Pollution Level", "temp": "Temperature", "clouds": "Cloudiness", "wind_power": "Wind Power"}
+PERCENTILES = [10, 50, 90]
+# create_plots has a date for every day of a year
+DAYS = 365
+
+
+class ClimateStats:
+   """
+   Aggregates of the fields of a Climate, a row for every day recorded, in arrays allocated up front.
+   means, stds - field -> (days + 1) array
+   type_means - field -> (days + 1, len(cell_types)) array, nan for types the world does not have
+   percentiles - field -> (days + 1, len(quantiles)) array
+   """
+   def __init__(self, days: int, quantiles: List[float] = PERCENTILES):
+      self.quantiles = np.asarray(quantiles, dtype=np.float64)
+      self.count = 0
+      self.means = {field: np.zeros(days + 1) for field in FIELDS}
+      self.stds = {field: np.zeros(days + 1) for field in FIELDS}
+      self.type_means = {field: np.zeros((days + 1, len(cell_types))) for field in FIELDS}
+      self.percentiles = {field: np.zeros((days + 1, len(self.quantiles))) for field in FIELDS}
+
+   def record(self, climate: Climate):
+      types = climate.types.ravel()
+      type_counts = np.bincount(types, minlength=len(cell_types))
+      for field in FIELDS:
+         values = getattr(climate, field).ravel()
+         self.means[field][self.count] = values.mean()
+         self.stds[field][self.count] = values.std()
+         with np.errstate(invalid="ignore"):
+            self.type_means[field][self.count] = np.bincount(types, weights=values, minlength=len(cell_types)) / type_counts
+         if len(self.quantiles):
+            self.percentiles[field][self.count] = np.percentile(values, self.quantiles)
+      self.count += 1
+
+   def arrays(self) -> Dict[str, np.ndarray]:
+      """
+      The days recorded of every metric, by "<field>_mean", "<field>_std", "<field>_type_means" and "<field>_percentiles".
+      """
+      arrays = {}
+      for field in FIELDS:
+         arrays[f"{field}_mean"] = self.means[field][:self.count]
+         arrays[f"{field}_std"] = self.stds[field][:self.count]
+         arrays[f"{field}_type_means"] = self.type_means[field][:self.count]
+         if len(self.quantiles):
+            arrays[f"{field}_percentiles"] = self.percentiles[field][:self.count]
+      return arrays
+
+   def save(self, path: str):
+      np.savez(path, quantiles=self.quantiles, **self.arrays())
+
+
+def measure(climate: Climate, days: int = DAYS, quantiles: List[float] = PERCENTILES,
+            on_day: Callable[[Climate], None] = None) -> ClimateStats:
+   """
+   Run climate days forward, recording its statistics before the first day and after every day.
+   on_day - called with climate after every day, e.g. checkpoints.snapshot_every
+   """
+   stats = ClimateStats(days, quantiles)
+   stats.record(climate)
+   for day in range(days):
+      climate.step()
+      stats.record(climate)
+      if on_day:
+         on_day(climate)
+   return stats
+
+def create_type_plots(stats: ClimateStats, path: str):
+   """
+   The means of every field by cell type, to path.
+   """
+   fig, axes = plt.subplots(len(FIELDS), 1, figsize=(12, 10))
+   for axis, field in zip(axes, FIELDS):
+      for type_index, cell_type in enumerate(cell_types):
+         type_means = stats.type_means[field][:stats.count, type_index]
+         if not np.isnan(type_means).all():
+            axis.plot(type_means, label=cell_type)
+      axis.set_title(f"{FIELD_TITLES[field]} by Cell Type")
+      axis.set_xlabel("Day")
+      axis.legend(loc="upper right")
+   plt.tight_layout(pad=4)
+   fig.savefig(path)
+   plt.close(fig)
+
+
+def main():
+   parser = argparse.ArgumentParser(description="Measure a year of a world without the UI, and write its plots to files")
+   parser.add_argument("--days", type=int, default=DAYS)
+   add_world_arguments(parser)
+   parser.add_argument("--percentiles", nargs="*", type=float, default=PERCENTILES)
+   parser.add_argument("--seed", type=int, default=None)
+   parser.add_argument("--output-dir", default="measures")
+   parser.add_argument("--checkpoints", default=None, help="empty directory to snapshot the world to, see checkpoints.py")
+   parser.add_argument("--every", type=int, default=30, help="days between snapshots")
+   args = parser.parse_args()
+   if not 0 < args.days <= DAYS:
+      parser.error(f"the plots cover a year, --days must be between 1 and {DAYS}")
+   if args.every < 1:
+      parser.error("--every must be at least 1")
+
+   plt.switch_backend("Agg")
+   climate = world_from_args(args, args.seed)
+   on_day = None
+   if args.checkpoints:
+      # imported here since checkpoints imports this module
+      from checkpoints import Checkpoints, snapshot_every
+      try:
+         checkpoints = Checkpoints(args.checkpoints, climate.rows, climate.cols)
+      except ValueError as error:
+         parser.error(str(error))
+      if len(checkpoints):
+         parser.error(f"{args.checkpoints} already has {len(checkpoints)} snapshots, resume them with checkpoints.py or give an empty directory")
+      checkpoints.append(climate)
+      on_day = snapshot_every(checkpoints, args.every)
+   stats = measure(climate, args.days, args.percentiles, on_day)
+   os.makedirs(args.output_dir, exist_ok=True)
+   stats.save(os.path.join(args.output_dir, "measures.npz"))
+   create_plots(*(normalize(stats.means[field]) for field in FIELDS), path=os.path.join(args.output_dir, "measures.png"))
+   create_type_plots(stats, os.path.join(args.output_dir, "types.png"))
+   for field in FIELDS:
+      print(f"{FIELD_TITLES[field]}: mean {stats.means[field][-1]:.3f}, std {stats.stds[field][-1]:.3f} after {args.days} days")
+
+
+if __name__ == "__main__":
+   main()
@@ -3,6 +3,7 @@ import tkinter as tk
 import pandas as pd
 import matplotlib.pyplot as plt
 import random 
+import sys
 import numpy as np 
 from tkinter import messagebox
 
@@ -21,7 +22,8 @@ MIN_CLOUD = 0
 MID_CLOUD = 6
 CELL_SIZE = 60
 
-def create_plots(pollution_measures, temp_measures, clouds_measures, wind_measures):
+# path - write the plots to this file instead of showing them
+def create_plots(pollution_measures, temp_measures, clouds_measures, wind_measures, path=None):
    iters = len(pollution_measures)
    dates = pd.date_range(start="2024-01-01", end="2024-12-31", freq='D').strftime('%d-%m')[:iters]
    dates_for_plot = pd.date_range(start="2024-01-01", end="2024-12-31", freq='MS').strftime('%d-%m')
@@ -40,7 +42,11 @@ def create_plots(pollution_measures, temp_measures, clouds_measures, wind_measur
       axes[i].set_xticks(dates_for_plot)
       axes[i].set_xlim([df.index.min(), df.index.max()])      
    plt.tight_layout(pad=4)
-   plt.show()
+   if path:
+      fig.savefig(path)
+      plt.close(fig)
+   else:
+      plt.show()
 
 
 cell_types = ["Desert", "Sea", "City", "Forest", "Mountain"]
@@ -62,44 +68,62 @@ directions = {
 
 pollution_levels = [{"level":"A", "color":"#2e6303"}, {"level":"A", "color":"#2e6303"}, {"level":"A", "color":"#2e6303"}, {"level":"B", "color":"#77e022"},{"level":"B", "color":"#77e022"}, {"level":"C", "color":"#c45b0a"},{"level":"C", "color":"#c45b0a"}, {"level":"D", "color":"#993003"}, {"level":"D", "color":"#993003"}, {"level":"E", "color":"#780905"}, {"level":"E", "color":"#780905"}]
 
+def cell_color(cell):
+   if cell.type == "Sea" and cell.temp <= 0:
+      return "#81dff0"
+   return cell_colors[cell.type]
+
 def check_wind(cell, direction):
    return cell.wind_power()!="None" and cell.wind.direction==direction
 
-def draw_cloud(canvas, row, col, clouds):
+# every overlay of a cell is drawn once, hidden, by draw_*,
+# and update_* changes its items when the values it shows change
+def draw_cloud(canvas, row, col):
     x = col*CELL_SIZE
     y = row*CELL_SIZE
     offsetX = CELL_SIZE//6
     offsetY = CELL_SIZE//(4*6)
     ball_size = 1.5*offsetX
+    return [canvas.create_oval(x+offsetX, y, x+offsetX+ball_size, y+ball_size, state="hidden"),
+            canvas.create_oval(x+2*offsetX, y, x+2*offsetX+ball_size, y+ball_size, state="hidden"),
+            canvas.create_oval(x+3*offsetX, y+2*offsetY, x +3*offsetX+ball_size, y +2*offsetY+ball_size, state="hidden"),
+            canvas.create_oval(x+2*offsetX, y+3*offsetY, x + 2*offsetX+ball_size, y+3*offsetY+ball_size, state="hidden"),
+            canvas.create_oval(x+offsetX, y+3*offsetY, x+offsetX+ball_size, y+3*offsetY+ball_size, state="hidden"),
+            canvas.create_oval(x, y+2*offsetY, x+ball_size, y+2*offsetY+ball_size, state="hidden")]
+
+def update_cloud(canvas, items, clouds):
     if clouds=="Strong":
        color = "#3d3c3b" #gray
     elif clouds=="Weak":
        color = "white"
     else:
+       for item in items:
+          canvas.itemconfig(item, state="hidden")
        return      
-    canvas.create_oval(x+offsetX, y, x+offsetX+ball_size, y+ball_size, fill=color, outline=color)
-    canvas.create_oval(x+2*offsetX, y, x+2*offsetX+ball_size, y+ball_size, fill=color, outline=color)
-    canvas.create_oval(x+3*offsetX, y+2*offsetY, x +3*offsetX+ball_size, y +2*offsetY+ball_size, fill=color, outline=color)
-    canvas.create_oval(x+2*offsetX, y+3*offsetY, x + 2*offsetX+ball_size, y+3*offsetY+ball_size, fill=color, outline=color)
-    canvas.create_oval(x+offsetX, y+3*offsetY, x+offsetX+ball_size, y+3*offsetY+ball_size, fill=color, outline=color)
-    canvas.create_oval(x, y+2*offsetY, x+ball_size, y+2*offsetY+ball_size, fill=color, outline=color)
+    for item in items:
+       canvas.itemconfig(item, fill=color, outline=color, state="normal")
 
 
-def draw_rain(canvas, row, col, raining: bool, temp: int):
-    if not raining:
-       return 
+def draw_rain(canvas, row, col):
     x = col*CELL_SIZE
     y = row*CELL_SIZE
     drop_length = CELL_SIZE//10
     offsetY = CELL_SIZE//2
     offsetX = CELL_SIZE//2-drop_length
+    return [canvas.create_line(x+offsetX+2*drop_length, y+offsetY, x+offsetX+2*drop_length, y+offsetY+drop_length, width=1, state="hidden"),
+            canvas.create_line(x+offsetX, y+offsetY, x+offsetX, y+offsetY+drop_length, width=1, state="hidden"),
+            canvas.create_line(x+offsetX+drop_length,y+ offsetY, x+offsetX+drop_length, y+offsetY+drop_length, width=1, state="hidden"),
+            canvas.create_line(x+offsetX+2*drop_length, y+offsetY+drop_length*2, x+offsetX+2*drop_length, y+offsetY+drop_length*3, width=1, state="hidden"),
+            canvas.create_line(x+offsetX, y+offsetY+drop_length*2, x+offsetX,y+ offsetY+drop_length*3, width=1, state="hidden"),
+            canvas.create_line(x+offsetX+drop_length, y+offsetY+drop_length*2, x+offsetX+drop_length,y+ offsetY+drop_length*3, width=1, state="hidden")]
+
+def update_rain(canvas, items, raining: bool, temp: int):
     color = "black" if temp>0 else "white"
-    canvas.create_line(x+offsetX+2*drop_length, y+offsetY, x+offsetX+2*drop_length, y+offsetY+drop_length, fill=color, width=1)
-    canvas.create_line(x+offsetX, y+offsetY, x+offsetX, y+offsetY+drop_length, fill=color, width=1)
-    canvas.create_line(x+offsetX+drop_length,y+ offsetY, x+offsetX+drop_length, y+offsetY+drop_length, fill=color, width=1)
-    canvas.create_line(x+offsetX+2*drop_length, y+offsetY+drop_length*2, x+offsetX+2*drop_length, y+offsetY+drop_length*3, fill=color, width=1)
-    canvas.create_line(x+offsetX, y+offsetY+drop_length*2, x+offsetX,y+ offsetY+drop_length*3, fill=color, width=1)
-    canvas.create_line(x+offsetX+drop_length, y+offsetY+drop_length*2, x+offsetX+drop_length,y+ offsetY+drop_length*3, fill=color, width=1)
+    for item in items:
+       if raining:
+          canvas.itemconfig(item, fill=color, state="normal")
+       else:
+          canvas.itemconfig(item, state="hidden")
 
 class Wind:
    def __init__(self, power: int, direction: str):
@@ -112,26 +136,41 @@ class Wind:
       else:
         self.direction = "-"
 
-def draw_wind(canvas, wind: Wind, row, col):
+def draw_wind(canvas, row, col):
   x = col*CELL_SIZE
   y = row*CELL_SIZE
+  # the second arrow is shown for strong wind
+  return [canvas.create_line(x+0.8*CELL_SIZE, y + 0.8*CELL_SIZE, x+0.8*CELL_SIZE, y + 0.8*CELL_SIZE, fill="black", width=2, arrow=tk.LAST, state="hidden"),
+          canvas.create_line(x+0.6*CELL_SIZE, y + 0.8*CELL_SIZE, x+0.6*CELL_SIZE, y + 0.8*CELL_SIZE, fill="black", width=2, arrow=tk.LAST, state="hidden")]
+
+def update_wind(canvas, items, wind: Wind, row, col):
   if wind.direction == "-":
+      for item in items:
+         canvas.itemconfig(item, state="hidden")
       return
+  x = col*CELL_SIZE
+  y = row*CELL_SIZE
   arrow_length = CELL_SIZE//4
-  if power(wind.power, MID_WIND_POWER)=="Strong":
-    canvas.create_line(x+0.6*CELL_SIZE, y + 0.8*CELL_SIZE,x + 0.6*CELL_SIZE + directions[wind.direction][0]*arrow_length, y + 0.8*CELL_SIZE + directions[wind.direction][1]*arrow_length, fill="black", width=2, arrow=tk.LAST) 
-
-  canvas.create_line(x+0.8*CELL_SIZE, y + 0.8*CELL_SIZE,x + 0.8*CELL_SIZE + directions[wind.direction][0]*arrow_length, y + 0.8*CELL_SIZE + directions[wind.direction][1]*arrow_length, fill="black", width=2, arrow=tk.LAST) 
+  for item, offsetX in zip(items, [0.8, 0.6]):
+    canvas.coords(item, x+offsetX*CELL_SIZE, y + 0.8*CELL_SIZE,x + offsetX*CELL_SIZE + directions[wind.direction][0]*arrow_length, y + 0.8*CELL_SIZE + directions[wind.direction][1]*arrow_length)
+  canvas.itemconfig(items[0], state="normal")
+  canvas.itemconfig(items[1], state="normal" if power(wind.power, MID_WIND_POWER)=="Strong" else "hidden")
          
-def draw_temperature(canvas, row, col, temperature: int):
+def draw_temperature(canvas, row, col):
     x = col*CELL_SIZE
     y = row*CELL_SIZE
-    canvas.create_text(x+CELL_SIZE//6, y+CELL_SIZE//2, text=str(int(temperature))+"°", fill="black", font=("Arial", CELL_SIZE//6))
+    return canvas.create_text(x+CELL_SIZE//6, y+CELL_SIZE//2, text="", fill="black", font=("Arial", CELL_SIZE//6))
+
+def update_temperature(canvas, item, temperature: int):
+    canvas.itemconfig(item, text=str(int(temperature))+"°")
 
-def draw_pollution(canvas, row, col, pollution_level: int): 
+def draw_pollution(canvas, row, col): 
    x = col*CELL_SIZE
    y = row*CELL_SIZE  
-   canvas.create_text(x+CELL_SIZE*0.8, y+CELL_SIZE//2, text=pollution_levels[int(pollution_level)]["level"], fill=pollution_levels[int(pollution_level)]["color"], font=("Arial", CELL_SIZE//6, "bold"))
+   return canvas.create_text(x+CELL_SIZE*0.8, y+CELL_SIZE//2, text="", font=("Arial", CELL_SIZE//6, "bold"))
+
+def update_pollution(canvas, item, pollution_level: int): 
+   canvas.itemconfig(item, text=pollution_levels[int(pollution_level)]["level"], fill=pollution_levels[int(pollution_level)]["color"])
 
 def power(parameter, MID_VALUE):
       if parameter == 0:
@@ -177,12 +216,11 @@ class EnvironmentCell:
       self.type = cell_types[next_type_index]
       return self.type
        
-class TheWorld(tk.Tk):
-   def __init__(self):
-    super().__init__()
-    self.running = False
-    self.title("The World is WARMING")
-    self.cells = [
+def default_cells():
+   """
+   The cells of the 8x6 world TheWorld starts with.
+   """
+   return [
                [EnvironmentCell(type="Forest", temp=20, wind=Wind(1, "north"), pollution_level=0, clouds=0), EnvironmentCell(type="Forest", temp=20, wind=Wind(3, "north_west"), pollution_level=0, clouds=0), EnvironmentCell(type="Desert", temp=20, wind=Wind(3, "north"), pollution_level=0, clouds=7), EnvironmentCell(type="Mountain", temp=20, wind=Wind(6, "east"), pollution_level=0, clouds=7), EnvironmentCell(type="Mountain", temp=20, wind=Wind(3, "north"), pollution_level=0, clouds=1), EnvironmentCell(type="Mountain", temp=20, wind=Wind(3, "north"), pollution_level=0, clouds=1)],
                [EnvironmentCell(type="City", temp=20, wind=Wind(0, "-"), pollution_level=CITY_INITIAL_POLLUTION, clouds=7), EnvironmentCell(type="City", temp=20, wind=Wind(3, "west"), pollution_level=CITY_INITIAL_POLLUTION, clouds=0),EnvironmentCell(type="Sea", temp=20, wind=Wind(3, "north"), pollution_level=0, clouds=7), EnvironmentCell(type="Sea", temp=20, wind=Wind(0, "-"), pollution_level=0, clouds=1), EnvironmentCell(type="City", temp=20, wind=Wind(3, "north_west"), pollution_level=CITY_INITIAL_POLLUTION, clouds=1), EnvironmentCell(type="Mountain", temp=20, wind=Wind(3, "north"), pollution_level=0, clouds=1)],
                [EnvironmentCell(type="City", temp=20, wind=Wind(0, "-"), pollution_level=CITY_INITIAL_POLLUTION, clouds=3), EnvironmentCell(type="City", temp=20, wind=Wind(3, "west"), pollution_level=CITY_INITIAL_POLLUTION, clouds=1), EnvironmentCell(type="Mountain", temp=20, wind=Wind(7, "north_west"), pollution_level=0, clouds=7), EnvironmentCell(type="Sea", temp=20, wind=Wind(1, "north_west"), pollution_level=0, clouds=7), EnvironmentCell(type="City", temp=20, wind=Wind(5, "north_west"), pollution_level=CITY_INITIAL_POLLUTION, clouds=1),EnvironmentCell(type="Mountain", temp=20, wind=Wind(3, "north"), pollution_level=0, clouds=1)],
@@ -192,10 +230,21 @@ class TheWorld(tk.Tk):
                [EnvironmentCell(type="Forest", temp=20, wind=Wind(1, "north_west"), pollution_level=0, clouds=0), EnvironmentCell(type="Forest", temp=20, wind=Wind(3, "north_west"), pollution_level=0, clouds=0), EnvironmentCell(type="Desert", temp=20, wind=Wind(3, "north"), pollution_level=0, clouds=4), EnvironmentCell(type="Sea", temp=-9, wind=Wind(3, "north"), pollution_level=0, clouds=7), EnvironmentCell(type="Sea", temp=-9, wind=Wind(0, "-"), pollution_level=0, clouds=1),EnvironmentCell(type="Mountain", temp=20, wind=Wind(3, "north"), pollution_level=0, clouds=1)],
                [EnvironmentCell(type="Forest", temp=20, wind=Wind(1, "north_west"), pollution_level=0, clouds=0), EnvironmentCell(type="Forest", temp=20, wind=Wind(3, "north_west"), pollution_level=0, clouds=0), EnvironmentCell(type="Desert", temp=20, wind=Wind(3, "north"), pollution_level=0, clouds=4), EnvironmentCell(type="Sea", temp=-9, wind=Wind(3, "north"), pollution_level=0, clouds=7), EnvironmentCell(type="Sea", temp=-9, wind=Wind(0, "-"), pollution_level=0, clouds=1), EnvironmentCell(type="Mountain", temp=20, wind=Wind(3, "north"), pollution_level=0, clouds=1)]
          ]
+
+class TheWorld(tk.Tk):
+   # cells - the world to start with, default_cells() if None
+   def __init__(self, cells=None):
+    super().__init__()
+    self.running = False
+    self.title("The World is WARMING")
+    self.cells = cells if cells is not None else default_cells()
     
     self.rows = len(self.cells)
     self.cols = len(self.cells[0])
     self.drawn_cells = [[None for _ in range(self.cols)] for _ in range(self.rows)]     
+    # items of the overlays of every cell, and the values they show
+    self.overlays = [[None for _ in range(self.cols)] for _ in range(self.rows)]
+    self.drawn_values = [[{} for _ in range(self.cols)] for _ in range(self.rows)]
     self.canvas = tk.Canvas(self, width=self.cols * CELL_SIZE, height=self.rows * CELL_SIZE)
     self.canvas.pack()
     self.create_grid()
@@ -213,43 +262,102 @@ class TheWorld(tk.Tk):
     label.grid(row=1, column=0, padx=5)
     self.iterations= tk.Entry(button_frame, width= 5)
     self.iterations.grid(row=1, column=1, padx=5)
+    draw_every_label = tk.Label(button_frame, text="Draw Every: ", font=("Arial", 12), fg="darkblue")
+    draw_every_label.grid(row=1, column=2, padx=5)
+    self.draw_every = tk.Entry(button_frame, width= 5)
+    self.draw_every.insert(0, "1")
+    self.draw_every.grid(row=1, column=3, padx=5)
 
    def create_grid(self):
+      """
+      Create the items of every cell once, draw_grid changes them as the world changes.
+      """
       for row in range(self.rows):
           for col in range(self.cols):
               x1 = col * CELL_SIZE
               x2 = x1 + CELL_SIZE
               y1 = row * CELL_SIZE
               y2 = y1 + CELL_SIZE
-              cell = self.cells[row][col]
-              if cell.type == "Sea" and cell.temp <= 0:
-                 color = "#81dff0"
-              else:
-                 color = cell_colors[cell.type]  
-              cell = self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="black")
+              cell = self.canvas.create_rectangle(x1, y1, x2, y2, fill=cell_color(self.cells[row][col]), outline="black")
               self.drawn_cells[row][col] = cell
               self.canvas.tag_bind(cell, "<Button-1>") 
-              draw_temperature(self.canvas, row, col, self.cells[row][col].temp)
-              draw_pollution(self.canvas, row, col, self.cells[row][col].pollution_level)
-              draw_wind(self.canvas, self.cells[row][col].wind, row, col)
-              draw_cloud(self.canvas, row, col, self.cells[row][col].clouds_power())
-              draw_rain(self.canvas, row, col, self.cells[row][col].rain, self.cells[row][col].temp)
+              self.overlays[row][col] = {
+                 "temp": draw_temperature(self.canvas, row, col),
+                 "pollution": draw_pollution(self.canvas, row, col),
+                 "wind": draw_wind(self.canvas, row, col),
+                 "cloud": draw_cloud(self.canvas, row, col),
+                 "rain": draw_rain(self.canvas, row, col)
+              }
+      self.draw_grid()
+
+   def draw_grid(self):
+      """
+      Update the items of the values that changed since they were last drawn.
+      """
+      for row in range(self.rows):
+          for col in range(self.cols):
+              cell = self.cells[row][col]
+              items = self.overlays[row][col]
+              drawn = self.drawn_values[row][col]
+              values = {
+                 "color": cell_color(cell),
+                 "temp": int(cell.temp),
+                 "pollution": int(cell.pollution_level),
+                 "wind": (cell.wind.direction, cell.wind_power()),
+                 "cloud": cell.clouds_power(),
+                 "rain": (cell.rain, cell.temp > 0)
+              }
+              if drawn.get("color") != values["color"]:
+                 self.canvas.itemconfig(self.drawn_cells[row][col], fill=values["color"])
+              if drawn.get("temp") != values["temp"]:
+                 update_temperature(self.canvas, items["temp"], cell.temp)
+              if drawn.get("pollution") != values["pollution"]:
+                 update_pollution(self.canvas, items["pollution"], cell.pollution_level)
+              if drawn.get("wind") != values["wind"]:
+                 update_wind(self.canvas, items["wind"], cell.wind, row, col)
+              if drawn.get("cloud") != values["cloud"]:
+                 update_cloud(self.canvas, items["cloud"], values["cloud"])
+              if drawn.get("rain") != values["rain"]:
+                 update_rain(self.canvas, items["rain"], cell.rain, cell.temp)
+              self.drawn_values[row][col] = values
       self.canvas.update_idletasks()
 
    # def toggle_cell(self, row, col):
    #    self.canvas.itemconfig(self.drawn_cells[row][col], fill=cell_colors[self.cells[row][col].type])
    def run_auto_with_draw(self):
+      # a press while a run is going would start a second one
+      if self.running:
+         return
       try:
          iters = int(self.iterations.get())
       except Exception:
          iters = 0 
-      if iters>50:
-         messagebox.showerror("Error", "To draw more than 50 iterations is crazy - be more moderate")
+      try:
+         draw_every = max(int(self.draw_every.get()), 1)
+      except Exception:
+         draw_every = 1
+      if -(-iters // draw_every)>50:
+         messagebox.showerror("Error", "To draw more than 50 iterations is crazy - be more moderate, or draw less often")
          return      
-      for i in range(iters):
-         self.after(100, self.update_world_and_draw())
+      self.running = True
+      self.run_step(0, iters, draw_every)
+
+   def run_step(self, i, iters, draw_every):
+      """
+      Run from iteration i to the next one that is drawn, and schedule the rest after it, so the window keeps responding.
+      """
+      while self.running and i < iters:
+         if (i+1) % draw_every == 0 or i == iters-1:
+            self.update_world_and_draw()
+            self.after(100, self.run_step, i + 1, iters, draw_every)
+            return
+         self.update_world()
+         i += 1
+      self.running = False
 
    def run_auto_no_draw(self):
+      if self.running:
+         return
       try:
          iters = int(self.iterations.get())
       except Exception:
@@ -264,38 +372,15 @@ class TheWorld(tk.Tk):
       self.running = False
 
    def measure(self):
-      iters = 365  
-      pollution_measures = [0 for _ in range(iters+1)]
-      temp_measures = [0 for _ in range(iters+1)]
-      clouds_measures = [0 for _ in range(iters+1)]
-      wind_measures = [0 for _ in range(iters+1)]   
-      pollution_measures[0]=np.mean([cell.pollution_level for row in self.cells for cell in row])
-      temp_measures[0]= np.mean([cell.temp for row in self.cells for cell in row])
-      clouds_measures[0]= np.mean([cell.clouds for row in self.cells for cell in row])
-      wind_measures[0]= np.mean([cell.wind.power for row in self.cells for cell in row])
-      
-      pollution_std = [0 for _ in range(iters+1)]
-      temp_std = [0 for _ in range(iters+1)]
-      clouds_std = [0 for _ in range(iters+1)]
-      wind_std = [0 for _ in range(iters+1)]   
-      pollution_std[0]=np.std([cell.pollution_level for row in self.cells for cell in row])
-      temp_std[0]= np.std([cell.temp for row in self.cells for cell in row])
-      clouds_std[0]= np.std([cell.clouds for row in self.cells for cell in row])
-      wind_std[0]= np.std([cell.wind.power for row in self.cells for cell in row])
-  
-      for i in range(iters):
-         if i==iters-1:
-            self.update_world_and_draw()
-         else:
-            self.update_world()   
-         pollution_measures[i+1]= np.mean([cell.pollution_level for row in self.cells for cell in row])
-         temp_measures[i+1]= np.mean([cell.temp for row in self.cells for cell in row])
-         clouds_measures[i+1]= np.mean([cell.clouds for row in self.cells for cell in row])
-         wind_measures[i+1]= np.mean([cell.wind.power for row in self.cells for cell in row])
-         pollution_std[i+1]= np.std([cell.pollution_level for row in self.cells for cell in row])
-         temp_std[i+1]= np.std([cell.temp for row in self.cells for cell in row])
-         clouds_std[i+1]= np.std([cell.clouds for row in self.cells for cell in row])
-         wind_std[i+1]= np.std([cell.wind.power for row in self.cells for cell in row])
+      # fast-forward on the array engine, imported here since it imports this module
+      from climate import Climate
+      from measures import measure, FIELDS, DAYS
+      climate = Climate.from_cells(self.cells)
+      stats = measure(climate, DAYS)
+      self.cells = climate.to_cells()
+      self.draw_grid()
+      pollution_measures, temp_measures, clouds_measures, wind_measures = (stats.means[field].tolist() for field in FIELDS)
+      pollution_std, temp_std, clouds_std, wind_std = (stats.stds[field].tolist() for field in FIELDS)
       print("----------------------------------------------------------------")
       print("Wind Avarage:", wind_measures)
       print("Wind STD:", wind_std)
@@ -319,7 +404,7 @@ class TheWorld(tk.Tk):
         
    def update_world_and_draw(self):
       self.update_world()
-      self.create_grid()
+      self.draw_grid()
 
    def adjust_clouds(self, row, col):
       cell = self.cells[row][col]
@@ -525,8 +610,14 @@ class TheWorld(tk.Tk):
          new_wind_power = min(abs(new_wind_powerX), abs(new_wind_powerY))
       return Wind(max(min(new_wind_power, MAX_WIND_POWER), MIN_WIND_POWER), direction)     
 
-automaton = TheWorld()
-automaton.mainloop()
+if __name__ == "__main__":
+   # a world file may be given, see worlds.load_world
+   if len(sys.argv) > 1:
+      from worlds import load_world
+      automaton = TheWorld(load_world(sys.argv[1]).to_cells())
+   else:
+      automaton = TheWorld()
+   automaton.mainloop()
 
 
 
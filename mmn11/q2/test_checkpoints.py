@@ -0,0 +1,64 @@
+import pytest
+from climate import Climate, STATE
+from checkpoints import Checkpoints, DAY_FILE, run_with_checkpoints, snapshot_every
+from worlds import generate_world
+
+
+def assert_same(climate: Climate, other: Climate):
+   assert climate.day == other.day
+   for name in STATE:
+      assert (getattr(climate, name) == getattr(other, name)).all()
+
+def world() -> Climate:
+   return generate_world(10, 12, rng=5)
+
+
+def test_replay_matches_a_run(tmp_path):
+   checkpoints = Checkpoints(str(tmp_path), 10, 12)
+   run_with_checkpoints(world(), 60, checkpoints, every=15)
+   assert checkpoints.days().tolist() == [0, 15, 30, 45, 60]
+   climate = world()
+   for day in range(61):
+      assert_same(Checkpoints(str(tmp_path)).replay(day), climate)
+      climate.step()
+
+def test_resume_matches_a_run(tmp_path):
+   run_with_checkpoints(world(), 40, Checkpoints(str(tmp_path), 10, 12), every=15)
+   checkpoints = Checkpoints(str(tmp_path))
+   resumed = checkpoints.restore()
+   run_with_checkpoints(resumed, 90, checkpoints, every=15)
+   assert checkpoints.days().tolist() == [0, 15, 30, 40, 45, 60, 75, 90]
+   climate = world()
+   climate.run(90)
+   assert_same(resumed, climate)
+
+def test_days_go_forward(tmp_path):
+   checkpoints = Checkpoints(str(tmp_path), 10, 12)
+   run_with_checkpoints(world(), 20, checkpoints, every=10)
+   with pytest.raises(ValueError):
+      checkpoints.append(world())
+   assert checkpoints.days().tolist() == [0, 10, 20]
+
+def test_torn_snapshot_is_dropped(tmp_path):
+   checkpoints = Checkpoints(str(tmp_path), 10, 12)
+   climate = world()
+   run_with_checkpoints(climate, 20, checkpoints, every=10)
+   # a snapshot cut off after its fields and part of its day
+   for name in STATE + ["day"]:
+      with open(checkpoints.path(DAY_FILE if name == "day" else f"{name}.dat"), "ab") as field_file:
+         field_file.write(b"\x01" * (3 if name == "day" else getattr(climate, name).nbytes))
+   checkpoints = Checkpoints(str(tmp_path))
+   assert len(checkpoints) == 3
+   climate.run(10)
+   checkpoints.append(climate)
+   assert checkpoints.days().tolist() == [0, 10, 20, 30]
+   assert_same(checkpoints.restore(), climate)
+
+def test_snapshots_are_days_apart(tmp_path):
+   checkpoints = Checkpoints(str(tmp_path), 10, 12)
+   for every in (0, -1):
+      with pytest.raises(ValueError):
+         run_with_checkpoints(world(), 20, checkpoints, every)
+      with pytest.raises(ValueError):
+         snapshot_every(checkpoints, every)
+   assert len(checkpoints) == 0
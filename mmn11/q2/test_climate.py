@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import q2
+from climate import Climate, DIRECTIONS, NUM_OF_DRAWS, STATE
+from worlds import generate_world
+
+# the draws of every adjust method of TheWorld, by their index in the draws of Climate.step
+DRAWS = {"adjust_clouds": [0], "adjust_rain": [1], "adjust_wind": [2, 3, 4]}
+
+
+class CellDraws:
+   """
+   Stands for the random module of q2, and gives every cell the draws Climate.step is given for it.
+   """
+   def __init__(self):
+      self.draws = None
+      self.cell_draws = iter(())
+
+   def random(self):
+      return next(self.cell_draws)
+
+
+@pytest.fixture
+def draws(monkeypatch):
+   cell_draws = CellDraws()
+   monkeypatch.setattr(q2, "random", cell_draws)
+   for name, kinds in DRAWS.items():
+      def adjust(self, row, col, adjust=getattr(q2.TheWorld, name), kinds=kinds):
+         cell_draws.cell_draws = (float(cell_draws.draws[kind, row, col]) for kind in kinds)
+         return adjust(self, row, col)
+      monkeypatch.setattr(q2.TheWorld, name, adjust)
+   return cell_draws
+
+def headless_world(cells) -> q2.TheWorld:
+   """
+   TheWorld without its window, update_world only needs the cells.
+   """
+   world = object.__new__(q2.TheWorld)
+   world.cells = cells
+   world.rows, world.cols = len(cells), len(cells[0])
+   return world
+
+def assert_same(world: q2.TheWorld, climate: Climate):
+   def field(value):
+      return np.array([[value(cell) for cell in row] for row in world.cells])
+   assert (field(lambda cell: cell.temp) == climate.temp).all()
+   assert (field(lambda cell: cell.pollution_level) == climate.pollution).all()
+   assert (field(lambda cell: cell.clouds) == climate.clouds).all()
+   assert (field(lambda cell: cell.rain) == climate.rain).all()
+   assert (field(lambda cell: cell.wind.power) == climate.wind_power).all()
+   assert (field(lambda cell: DIRECTIONS.index(cell.wind.direction)) == climate.wind_direction).all()
+
+def run_both(cells, days: int, draws: CellDraws, seed: int):
+   world, climate = headless_world(cells), Climate.from_cells(cells)
+   rng = np.random.default_rng(seed)
+   for day in range(days):
+      draws.draws = rng.random((NUM_OF_DRAWS, world.rows, world.cols))
+      world.update_world()
+      climate.step(draws.draws)
+      assert_same(world, climate)
+
+
+def test_default_world_matches_the_world(draws):
+   run_both(q2.default_cells(), 365, draws, 0)
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_generated_world_matches_the_world(draws, seed):
+   run_both(generate_world(12, 15, rng=seed).to_cells(), 200, draws, seed)
+
+def test_cells_round_trip():
+   climate = generate_world(9, 11, rng=3)
+   climate.run(30)
+   again = Climate.from_cells(climate.to_cells())
+   for name in STATE:
+      assert (getattr(again, name) == getattr(climate, name)).all()
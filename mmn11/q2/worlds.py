@@ -0,0 +1,150 @@
+import argparse
+import os
+from typing import Dict
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.colors import to_rgb
+from q2 import cell_types, cell_colors, CITY_INITIAL_POLLUTION, MID_WIND_POWER, MID_CLOUD
+from climate import Climate, STATE, DIRECTIONS
+
+DEFAULT_TEMP = 20
+# fractions of a generated world, the types not given share the rest
+FRACTIONS = {"Sea": 0.3, "City": 0.1, "Forest": 0.25}
+# generated types by the height of their cells, lowest first
+TYPES_BY_HEIGHT = ["Sea", "City", "Forest", "Desert", "Mountain"]
+# cells of the coarsest noise of a generated world, along a side
+SCALE = 32
+TYPE_RGB = np.array([to_rgb(cell_colors[cell_type]) for cell_type in cell_types])
+
+
+def world_of_types(types: np.ndarray, rng = None) -> Climate:
+   """
+   A calm, clear world of the cell types given, its cities as polluted as those of TheWorld start.
+   """
+   types = np.asarray(types, dtype=np.uint8)
+   pollution = np.where(types == cell_types.index("City"), CITY_INITIAL_POLLUTION, 0)
+   return Climate(types, np.full(types.shape, DEFAULT_TEMP), pollution, np.zeros(types.shape), np.zeros(types.shape, dtype=bool),
+                  np.zeros(types.shape), np.zeros(types.shape), rng)
+
+def smooth_noise(rows: int, cols: int, scale: int, rng: np.random.Generator) -> np.ndarray:
+   """
+   Random values on a grid of cells scale apart, interpolated bilinearly to rows x cols.
+   """
+   coarse = rng.random((rows // scale + 2, cols // scale + 2))
+   row_pos, col_pos = np.arange(rows) / scale, np.arange(cols) / scale
+   row0, col0 = row_pos.astype(np.intp), col_pos.astype(np.intp)
+   row_frac, col_frac = (row_pos - row0)[:, None], col_pos - col0
+   top = coarse[row0][:, col0] * (1 - col_frac) + coarse[row0][:, col0 + 1] * col_frac
+   bottom = coarse[row0 + 1][:, col0] * (1 - col_frac) + coarse[row0 + 1][:, col0 + 1] * col_frac
+   return top * (1 - row_frac) + bottom * row_frac
+
+def generate_world(rows: int, cols: int, fractions: Dict[str, float] = FRACTIONS, scale: int = SCALE, rng = None) -> Climate:
+   """
+   A world of rows x cols with a random height map, its lowest cells sea and its highest mountains,
+   by the order of TYPES_BY_HEIGHT. Every type gets its fraction of the cells rounded down to a whole number of cells,
+   so not exactly its share, and the few cells left over are mountains.
+   Winds and clouds are random, like those of the world of TheWorld.
+   """
+   rng = np.random.default_rng(rng)
+   if any(cell_type not in cell_types for cell_type in fractions) or sum(fractions.values()) > 1:
+      raise ValueError(f"fractions must be of {cell_types} and sum to at most 1, not {fractions}")
+   rest = [cell_type for cell_type in TYPES_BY_HEIGHT if cell_type not in fractions]
+   shares = {cell_type: fractions.get(cell_type, (1 - sum(fractions.values())) / max(len(rest), 1)) for cell_type in TYPES_BY_HEIGHT}
+   # octaves of noise, each half the scale and half the weight of the last
+   height = np.zeros((rows, cols))
+   octave_scale, weight = scale, 1.0
+   while octave_scale >= 1:
+      height += weight * smooth_noise(rows, cols, octave_scale, rng)
+      octave_scale, weight = octave_scale // 2, weight / 2
+   types = np.full(rows * cols, cell_types.index(TYPES_BY_HEIGHT[-1]), dtype=np.uint8)
+   start = 0
+   order = np.argsort(height.ravel(), kind="stable")
+   for cell_type in TYPES_BY_HEIGHT:
+      count = int(shares[cell_type] * rows * cols)
+      types[order[start:start + count]] = cell_types.index(cell_type)
+      start += count
+   world = world_of_types(types.reshape(rows, cols), rng)
+   world.clouds = rng.integers(0, MID_CLOUD + 2, size=(rows, cols)).astype(np.float64)
+   world.wind_power = rng.integers(0, MID_WIND_POWER + 2, size=(rows, cols)).astype(np.int16)
+   world.wind_direction = np.where(world.wind_power > 0, rng.integers(1, len(DIRECTIONS), size=(rows, cols)), 0).astype(np.uint8)
+   return world
+
+def load_types_map(path: str) -> np.ndarray:
+   """
+   Cell types from a PNG of cell_colors, every pixel the type of the nearest color,
+   or from a CSV of type names or indices in cell_types.
+   """
+   if path.endswith(".png"):
+      pixels = plt.imread(path)[..., :3]
+      if pixels.dtype == np.uint8:
+         pixels = pixels / 255
+      return ((pixels[..., None, :] - TYPE_RGB) ** 2).sum(axis=-1).argmin(axis=-1).astype(np.uint8)
+   names = np.char.strip(np.loadtxt(path, dtype=str, delimiter=",", ndmin=2))
+   types = np.zeros(names.shape, dtype=np.uint8)
+   for index, name in np.ndenumerate(names):
+      if name.isdigit() and int(name) < len(cell_types):
+         types[index] = int(name)
+      elif name in cell_types:
+         types[index] = cell_types.index(name)
+      else:
+         raise ValueError(f"{path}: unknown cell type {str(name)!r} at {index}")
+   return types
+
+def load_world(path: str, rng = None) -> Climate:
+   """
+   A world from a .npz of the arrays of Climate, only types is required, the other fields are those of world_of_types,
+   or from a map of its cell types, see load_types_map.
+   """
+   if not path.endswith(".npz"):
+      return world_of_types(load_types_map(path), rng)
+   with np.load(path) as arrays:
+      world = world_of_types(arrays["types"], rng)
+      for name in STATE:
+         if name in arrays.files:
+            setattr(world, name, arrays[name].astype(getattr(world, name).dtype))
+   for name in STATE:
+      if getattr(world, name).shape != world.types.shape:
+         raise ValueError(f"{path}: {name} is {getattr(world, name).shape}, types is {world.types.shape}")
+   return world
+
+def save_world(path: str, world: Climate):
+   np.savez_compressed(path, **{name: getattr(world, name) for name in STATE})
+
+def save_types_map(path: str, world: Climate):
+   plt.imsave(path, TYPE_RGB[world.types])
+
+
+def add_world_arguments(parser: argparse.ArgumentParser):
+   parser.add_argument("--world", default=None, help=".npz, .png or .csv world, the world of TheWorld by default")
+   parser.add_argument("--size", nargs=2, type=int, default=None, metavar=("ROWS", "COLS"), help="generate a world of this size")
+   for cell_type in FRACTIONS:
+      parser.add_argument(f"--{cell_type.lower()}", type=float, default=FRACTIONS[cell_type], help=f"fraction of {cell_type} in a generated world")
+   parser.add_argument("--tile", type=int, default=1, help="repeat the world tile x tile times")
+
+def world_from_args(args: argparse.Namespace, rng = None) -> Climate:
+   rng = np.random.default_rng(rng)
+   if args.world:
+      world = load_world(args.world, rng)
+   elif args.size:
+      world = generate_world(*args.size, {cell_type: getattr(args, cell_type.lower()) for cell_type in FRACTIONS}, rng=rng)
+   else:
+      world = Climate.default(rng)
+   return world.tiled(args.tile, rng) if args.tile > 1 else world
+
+
+def main():
+   parser = argparse.ArgumentParser(description="Generate a world, or convert a map of one, to a .npz and a .png of its cell types")
+   parser.add_argument("output", help=".npz file of the world, its map is written next to it")
+   add_world_arguments(parser)
+   parser.add_argument("--seed", type=int, default=None)
+   args = parser.parse_args()
+
+   world = world_from_args(args, args.seed)
+   save_world(args.output, world)
+   save_types_map(os.path.splitext(args.output)[0] + ".png", world)
+   counts = np.bincount(world.types.ravel(), minlength=len(cell_types))
+   print(f"{world.rows}x{world.cols}: " + ", ".join(f"{cell_type} {count / world.types.size:.1%}" for cell_type, count in zip(cell_types, counts)))
+
+
+if __name__ == "__main__":
+   main()
@@ -0,0 +1,121 @@
+from collections import Counter
+from typing import Dict, Tuple
+from lab import *
+
+
+def extension_products(sequence: str, primer1: str, primer2: str) -> Tuple[str, ...]:
+    """
+    The strands one PCR cycle synthesizes on a single copy of sequence.
+    Like polymerase, an extension stops at bases that an earlier primer of the same cycle already covered.
+    """
+    covered = [False] * len(sequence)
+    products = []
+    for _, offset, backwards in find_primer_sites([sequence], primer1, primer2):
+        if covered[offset]:
+            continue
+        first = last = offset
+        if backwards:
+            while first > 0 and not covered[first - 1]:
+                first -= 1
+        else:
+            while last < len(sequence) - 1 and not covered[last + 1]:
+                last += 1
+        covered[first:last + 1] = [True] * (last - first + 1)
+        products.append(create_complementary(sequence[first:last + 1]))
+    return tuple(products)
+
+
+class CountedStrand:
+    """
+    One distinct sequence of an AmplifiedTube, and how many copies of it the tube holds.
+    """
+    def __init__(self, sequence: str, copies: int):
+        self.sequence = sequence
+        self.copies = copies
+
+    def get_sequence(self) -> str:
+        return self.sequence
+
+    def __len__(self):
+        return len(self.sequence)
+
+    def write(self, out):
+        out.write(f"{self.copies} copies of:\n")
+        DNAStrand(self.sequence).write(out)
+
+    def __str__(self):
+        return f"{self.copies} copies of:\n" + str(DNAStrand(self.sequence))
+
+
+class AmplifiedTube(TestTube):
+    """
+    TestTube that keeps every distinct sequence once, with its number of copies,
+    so PCR multiplies numbers instead of copying Nucleotide objects.
+    cycles - number of PCR cycles
+    efficiency - the chance of every primer site to be extended in a cycle
+    rng - numpy Generator or seed of the extensions and samples
+    """
+    def __init__(self, counts: Dict[str, int], cycles: int = NUM_OF_REPS, efficiency: float = 1.0, rng = None):
+        self.rng = make_rng(rng)
+        self.pool = []
+        self.strands = [CountedStrand(sequence, copies) for sequence, copies in counts.items() if copies > 0]
+        self.cycles = cycles
+        self.efficiency = efficiency
+
+    @classmethod
+    def from_test_tube(cls, test_tube: TestTube, cycles: int = NUM_OF_REPS, efficiency: float = 1.0) -> "AmplifiedTube":
+        """
+        Count the strands of a ligated test tube, the counted tube goes on with its Generator.
+        """
+        return cls(Counter(strand.get_sequence() for strand in test_tube.strands), cycles, efficiency, test_tube.rng)
+
+    def get_counts(self) -> Dict[str, int]:
+        return {strand.sequence: strand.copies for strand in self.strands}
+
+    def num_of_molecules(self) -> int:
+        return sum(strand.copies for strand in self.strands)
+
+    def get_copies(self, strand: CountedStrand) -> int:
+        return strand.copies
+
+    def ligation(self, indexed: bool = False):
+        """
+        The strands were already ligated before they were counted.
+        """
+        pass
+
+    def pcr(self, primer1: str, primer2: str):
+        by_sequence = {strand.sequence: strand for strand in self.strands}
+        #the products of every sequence are the same in all cycles, they are found once for this tube
+        extensions: Dict[str, Tuple[str, ...]] = {}
+        for i in range(self.cycles):
+            products = Counter()
+            for strand in self.strands:
+                if strand.sequence not in extensions:
+                    extensions[strand.sequence] = extension_products(strand.sequence, primer1, primer2)
+                for product in extensions[strand.sequence]:
+                    if self.efficiency >= 1:
+                        products[product] += strand.copies
+                    else:
+                        products[product] += int(self.rng.binomial(strand.copies, self.efficiency))
+            for sequence, copies in products.items():
+                if sequence in by_sequence:
+                    by_sequence[sequence].copies += copies
+                elif copies > 0:
+                    by_sequence[sequence] = CountedStrand(sequence, copies)
+                    self.strands.append(by_sequence[sequence])
+
+    def sample(self, amount: int) -> "AmplifiedTube":
+        """
+        Take amount molecules out of the tube, at random.
+        """
+        counts = self.rng.multivariate_hypergeometric([strand.copies for strand in self.strands], min(amount, self.num_of_molecules()))
+        return AmplifiedTube({strand.sequence: int(copies) for strand, copies in zip(self.strands, counts)}, self.cycles, self.efficiency, self.rng)
+
+    def expand(self, amount: int = None) -> TestTube:
+        """
+        Build a TestTube of DNAStrand objects, with every copy of every sequence.
+        amount - sample that many molecules first
+        """
+        tube = self if amount is None else self.sample(amount)
+        return TestTube([DNAStrand(strand.sequence) for strand in tube.strands for i in range(strand.copies)], self.rng)
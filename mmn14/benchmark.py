@@ -0,0 +1,102 @@
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Dict
+from lab import *
+from amplification import AmplifiedTube
+from cnf import SATInstance, ENGINES, random_formula
+
+AMOUNTS = [100, 400]
+VARIABLES = [3, 4, 5]
+
+
+class StageTimer:
+    """
+    Time every stage of a run, and its peak memory if tracemalloc is on.
+    Memory of worker processes of the parallel engine is not traced.
+    """
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def run(self, name: str, stage, *args):
+        if self.trace_memory:
+            tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            result = stage(*args)
+            seconds = time.perf_counter() - start
+            self.stages[name] = {"seconds": seconds}
+            if self.trace_memory:
+                self.stages[name]["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            #a stage that raised must not leave tracing on for the next ones
+            if self.trace_memory:
+                tracemalloc.stop()
+        return result
+
+
+def run_benchmark(instance: SATInstance, amount: int, engine: str, cycles: int, trace_memory: bool = True, workers: int = None) -> Dict:
+    """
+    Run the lab on instance, every stage timed on its own.
+    cycles - PCR cycles on counted strands (AmplifiedTube), 0 to run the PCR of the tube itself
+    """
+    timer = StageTimer(trace_memory)
+    with timer.run("build", instance.create_test_tube, amount, engine, workers) as test_tube:
+        timer.run("ligation", test_tube.ligation, True)
+        if cycles:
+            lab_tube = timer.run("count", AmplifiedTube.from_test_tube, test_tube, cycles)
+        else:
+            lab_tube = test_tube
+        timer.run("pcr", lab_tube.pcr, instance.primer1, instance.primer2)
+        timer.run("gel_elecro", lab_tube.gel_elecro, instance.num_of_muls)
+        timer.run("perform_magnetic_in_row", lab_tube.perform_magnetic_in_row, instance.formula_in_dna)
+        paths = timer.run("translate", lab_tube.translate, instance.sequences)
+    return {
+        "engine": engine,
+        "variables": len(instance.variables),
+        "clauses": len(instance.formula),
+        "amount": amount,
+        "cycles": cycles,
+        "molecules": amount * len(instance.get_molecules()),
+        "final_strands": len(lab_tube.strands),
+        "stages": timer.stages,
+        "total_seconds": sum(stage["seconds"] for stage in timer.stages.values()),
+        "assignments": len(paths),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stages of the DNA computing lab")
+    parser.add_argument("--variables", nargs="*", type=int, default=VARIABLES, help="numbers of variables of the random 3-CNF formulas")
+    parser.add_argument("--clauses-ratio", type=float, default=2.0, help="clauses per variable")
+    parser.add_argument("--amounts", nargs="*", type=int, default=AMOUNTS, help="copies of every molecule")
+    parser.add_argument("--engines", nargs="*", choices=ENGINES, default=["reference", "packed"])
+    parser.add_argument("--cycles", type=int, default=0, help="PCR cycles on counted strands, 0 runs the PCR of the tube")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-memory", action="store_true", help="do not trace memory, it slows the stages down")
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args()
+
+    rng = make_rng(args.seed)
+    results = []
+    for num_of_vars in args.variables:
+        variables, formula = random_formula(num_of_vars, max(1, int(num_of_vars * args.clauses_ratio)), rng=rng)
+        instance = SATInstance(variables, formula, rng=rng)
+        for amount in args.amounts:
+            for engine in args.engines:
+                for repeat in range(args.repeats):
+                    result = run_benchmark(instance, amount, engine, args.cycles, not args.no_memory, args.workers)
+                    result["repeat"] = repeat
+                    results.append(result)
+                    stages = ", ".join(f"{name} {stage['seconds']:.3f}s" for name, stage in result["stages"].items())
+                    print(f"{engine} variables={num_of_vars} amount={amount}: {stages}")
+    with open(args.output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import time
+from typing import List, Tuple, Dict
+from lab import *
+from strand_store import StrandStore, PackedTestTube
+from parallel import ParallelTestTube
+from amplification import AmplifiedTube
+from codes import create_designed_sequences
+
+AMOUNT = 400
+PCR_CYCLES = 25
+ENGINES = ["reference", "packed", "parallel"]
+
+
+def read_dimacs(path: str) -> Tuple[List[str], List[List[str]]]:
+    """
+    Read a DIMACS CNF file. Variable i is named xi, and its negation xi'.
+    Return the variables and the clauses.
+    Raise ValueError if the file has no "p cnf" line, or a literal of a variable it does not declare.
+    """
+    num_of_vars = None
+    literals = []
+    with open(path) as cnf_file:
+        for line in cnf_file:
+            line = line.strip()
+            if not line or line[0] in "c%":
+                continue
+            if line[0] == "p":
+                header = line.split()
+                if len(header) < 4 or header[1] != "cnf" or not header[2].isdigit():
+                    raise ValueError(f"{path}: bad problem line {line!r}, expected \"p cnf <variables> <clauses>\"")
+                num_of_vars = int(header[2])
+                continue
+            literals += [int(literal) for literal in line.split()]
+    if not num_of_vars:
+        raise ValueError(f"{path}: no \"p cnf <variables> <clauses>\" line with at least one variable")
+    out_of_range = [literal for literal in literals if abs(literal) > num_of_vars]
+    if out_of_range:
+        raise ValueError(f"{path}: literal {out_of_range[0]} is out of the {num_of_vars} variables of the problem line")
+    formula = []
+    clause = []
+    for literal in literals:
+        if literal == 0:
+            if clause:
+                formula.append(clause)
+            clause = []
+        else:
+            clause.append(f"x{abs(literal)}" if literal > 0 else f"x{abs(literal)}'")
+    if clause:
+        formula.append(clause)
+    return [f"x{i}" for i in range(1, num_of_vars + 1)], formula
+
+def random_formula(num_of_vars: int, num_of_clauses: int, clause_len: int = 3, rng = None) -> Tuple[List[str], List[List[str]]]:
+    rng = make_rng(rng)
+    variables = [f"x{i}" for i in range(1, num_of_vars + 1)]
+    formula = []
+    for i in range(num_of_clauses):
+        clause = [variables[index] for index in rng.choice(num_of_vars, min(clause_len, num_of_vars), replace=False)]
+        formula.append([var if rng.random() < 0.5 else f"{var}'" for var in clause])
+    return variables, formula
+
+def check_assignment(formula: List[List[str]], assignment: Dict[str, bool]) -> bool:
+    return all(any(assignment.get(symbol.rstrip("'")) == (symbol[-1] != "'") for symbol in clause) for clause in formula)
+
+
+class SATInstance:
+    """
+    The Lipton graph of a CNF formula: a1 -> x or x' -> a2 -> y or y' -> ... -> a(n+1),
+    every path from a1 to a(n+1) is an assignment of the variables.
+    Holds everything the lab needs for it - sequences, molecules, primers and the length of a full path.
+    sequences - vertex -> sequence, random sequences are created if not given
+    designed - create the sequences from a designed code book instead of at random
+    rng - numpy Generator or seed of the random sequences and of the tubes, unless a tube is given its own
+    """
+    def __init__(self, variables: List[str], formula: List[List[str]], sequences: Dict[str, str] = None, designed: bool = False, rng = None):
+        if not variables:
+            raise ValueError("a formula needs at least one variable")
+        unknown = [symbol for clause in formula for symbol in clause if symbol.rstrip("'") not in variables]
+        if unknown:
+            raise ValueError(f"{unknown[0]} is not one of the variables {variables} or their negations")
+        self.rng = make_rng(rng)
+        self.variables = variables
+        self.formula = formula
+        self.comp_variables = [f"{var}'" for var in variables]
+        self.con_vertices = [f"a{i}" for i in range(1, len(variables)+2)]
+        self.first_vertex, self.last_vertex = self.con_vertices[0], self.con_vertices[-1]
+        self.vertices = variables + self.comp_variables + self.con_vertices
+        if sequences:
+            self.sequences = sequences
+        elif designed:
+            self.sequences = create_designed_sequences(self.vertices)
+        else:
+            self.sequences = create_random_sequences(self.vertices, self.rng)
+
+        self.edges = [(self.first_vertex, variables[0]), (self.first_vertex, self.comp_variables[0])]
+        self.edges += [(con_vertex, var) for con_vertex, var in zip(self.con_vertices[1:], variables[1:])]
+        self.edges += [(con_vertex, comp_var) for con_vertex, comp_var in zip(self.con_vertices[1:], self.comp_variables[1:])]
+        self.edges += [(var, con_vertex) for con_vertex, var in zip(self.con_vertices[1:], variables)]
+        self.edges += [(comp_var, con_vertex) for con_vertex, comp_var in zip(self.con_vertices[1:], self.comp_variables)]
+        self.edges_molecules: List[str] = create_edges(self.first_vertex, self.last_vertex, self.edges, self.sequences)
+
+        self.primer1 = self.sequences[self.first_vertex]
+        self.primer2 = create_complementary(self.sequences[self.last_vertex])
+        self.formula_in_dna = [[self.sequences[symbol] for symbol in clause] for clause in formula]
+        #a full path has a connector vertex and a variable vertex per variable, and the last connector
+        self.num_of_muls = 2 * len(variables) + 1
+
+    def get_molecules(self) -> List[Tuple[str, bool]]:
+        """
+        (sequence, start_seq) of every kind of molecule in the tube, connector vertices are put twice.
+        """
+        molecules = [(create_complementary(self.sequences[vertex]), False) for vertex in self.vertices]
+        molecules += [(create_complementary(self.sequences[vertex]), False) for vertex in self.con_vertices]
+        molecules += [(molecule, False) for molecule, (v1, v2) in zip(self.edges_molecules, self.edges) if v1 != self.first_vertex]
+        molecules += [(molecule, True) for molecule, (v1, v2) in zip(self.edges_molecules, self.edges) if v1 == self.first_vertex]
+        return molecules
+
+    def create_test_tube(self, amount: int = AMOUNT, engine: str = "packed", workers: int = None, rng = None) -> TestTube:
+        """
+        The engines add the molecules in the same order, so tubes given the same seed make the same random draws.
+        """
+        rng = self.rng if rng is None else rng
+        molecules = self.get_molecules()
+        if engine == "reference":
+            return TestTube([DNAStrand(molecule, start_seq) for molecule, start_seq in molecules for i in range(amount)], rng)
+        store = StrandStore()
+        for molecule, start_seq in molecules:
+            for i in range(amount):
+                store.add_strand(molecule, start_seq)
+        if engine == "parallel":
+            return ParallelTestTube(store, workers, rng)
+        return PackedTestTube(store, rng)
+
+    def solve(self, amount: int = AMOUNT, engine: str = "packed", cycles: int = PCR_CYCLES, efficiency: float = 1.0, workers: int = None, rng = None) -> AmplifiedTube:
+        """
+        Ligate a tube of the molecules in the given engine, then count its strands and run the rest of the lab on the counts.
+        """
+        with self.create_test_tube(amount, engine, workers, rng) as test_tube:
+            test_tube.ligation(indexed=True)
+        test_tube = AmplifiedTube.from_test_tube(test_tube, cycles, efficiency)
+        test_tube.solve(self.primer1, self.primer2, self.formula_in_dna, self.num_of_muls, show=False)
+        return test_tube
+
+    def iter_assignments(self, test_tube: TestTube):
+        """
+        Yield the assignment of every path that survived the lab, as soon as it is decoded.
+        """
+        for path in test_tube.iter_translate(self.sequences):
+            yield {var.rstrip("'"): var[-1] != "'" for var in path[1::2]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve CNF formulas in the DNA computing lab")
+    parser.add_argument("files", nargs="*", help="DIMACS CNF files")
+    parser.add_argument("--generate", nargs="*", type=int, default=[], help="numbers of variables of random 3-CNF formulas to generate")
+    parser.add_argument("--clauses-ratio", type=float, default=2.0, help="clauses per variable of generated formulas")
+    parser.add_argument("--amount", type=int, default=AMOUNT, help="copies of every molecule")
+    parser.add_argument("--engine", choices=ENGINES, default="packed")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cycles", type=int, default=PCR_CYCLES)
+    parser.add_argument("--efficiency", type=float, default=1.0)
+    parser.add_argument("--designed", action="store_true", help="use designed vertex sequences")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the formulas, sequences and tubes")
+    parser.add_argument("--fasta", default=None, help="write the strands left in every tube to this FASTA file")
+    args = parser.parse_args()
+
+    rng = make_rng(args.seed)
+    instances = [(path, *read_dimacs(path)) for path in args.files]
+    instances += [(f"random-{n}", *random_formula(n, max(1, int(n * args.clauses_ratio)), rng=rng)) for n in args.generate]
+    print("instance, variables, clauses, molecules, seconds, assignments, all satisfy")
+    fasta_file = open(args.fasta, "w") if args.fasta else None
+    for name, variables, formula in instances:
+        instance = SATInstance(variables, formula, designed=args.designed, rng=rng)
+        start = time.perf_counter()
+        test_tube = instance.solve(args.amount, args.engine, args.cycles, args.efficiency, args.workers)
+        assignments = list(instance.iter_assignments(test_tube))
+        seconds = time.perf_counter() - start
+        valid = all(check_assignment(formula, assignment) for assignment in assignments)
+        print(f"{name}, {len(variables)}, {len(formula)}, {args.amount * len(instance.get_molecules())}, {seconds:.3f}, {len(assignments)}, {valid}")
+        if fasta_file:
+            fasta_file.write(f";{name}\n")
+            test_tube.write_fasta(fasta_file)
+    if fasta_file:
+        fasta_file.close()
+
+
+if __name__ == "__main__":
+    main()
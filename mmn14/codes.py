@@ -0,0 +1,103 @@
+import json
+import os
+from typing import List, Dict
+import numpy as np
+from lab import *
+
+MIN_DISTANCE = BASE // 3
+MIN_HALF_DISTANCE = 3
+MIN_GC = 0.4
+MAX_GC = 0.6
+MAX_CANDIDATES = 1000000
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".codes_cache")
+
+# a word is packed 2 bits per base, first base in the highest bits.
+# the codes are A=0, C=1, G=2, T=3, so the complement of a word is word ^ all ones,
+# and C, G are the bases whose two bits differ
+BITS = {"A": 0, "C": 1, "G": 2, "T": 3}
+NUCLEOTIDES_BY_BITS = sorted(BITS, key=BITS.get)
+LOW_BITS = int("01" * BASE, 2)
+HALF_BITS = BASE // 2 * 2
+POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    return POPCOUNT[words.view(np.uint8)].reshape(len(words), -1).sum(axis=1)
+
+def base_distance(words1: np.ndarray, words2: np.ndarray) -> np.ndarray:
+    """
+    Number of different bases of packed words.
+    """
+    diff = words1 ^ words2
+    return popcount((diff | (diff >> np.uint64(1))) & np.uint64(LOW_BITS))
+
+def pack(sequence: str) -> int:
+    word = 0
+    for base in sequence:
+        word = word << 2 | BITS[base]
+    return word
+
+def unpack(word: int, length: int = BASE) -> str:
+    return "".join(NUCLEOTIDES_BY_BITS[word >> 2 * (length - 1 - i) & 3] for i in range(length))
+
+
+def design_codes(count: int, min_distance: int = MIN_DISTANCE, min_half_distance: int = MIN_HALF_DISTANCE,
+                 min_gc: float = MIN_GC, max_gc: float = MAX_GC, seed: int = None) -> List[str]:
+    """
+    Draw count words of BASE bases, such that:
+    every two words, and every word and the complement of another, differ in at least min_distance bases;
+    every two halves (the BASE // 2 bases ligation matches), and every half and the complement of a half,
+    differ in at least min_half_distance bases;
+    the fraction of G and C of every word is in [min_gc, max_gc].
+    seed - seed or numpy Generator of the candidate words
+    """
+    rng = make_rng(seed)
+    full = (1 << 2 * BASE) - 1
+    half_mask = np.uint64((1 << HALF_BITS) - 1)
+    words = np.zeros(0, dtype=np.uint64)
+    halves = np.zeros(0, dtype=np.uint64)
+    candidates = 0
+    while len(words) < count:
+        if candidates >= MAX_CANDIDATES:
+            raise Exception(f"Could not design {count} codes with these constraints, found {len(words)}")
+        batch = rng.integers(0, full, size=4096, dtype=np.uint64, endpoint=True)
+        candidates += len(batch)
+        gc = popcount((batch ^ (batch >> np.uint64(1))) & np.uint64(LOW_BITS)) / BASE
+        for word in batch[(gc >= min_gc) & (gc <= max_gc)]:
+            comp = word ^ np.uint64(full)
+            word_halves = np.array([word >> np.uint64(HALF_BITS), word & half_mask], dtype=np.uint64)
+            comp_halves = word_halves ^ half_mask
+            if min(base_distance(word_halves[:1], word_halves[1:])[0], base_distance(word_halves[:1], comp_halves[1:])[0]) < min_half_distance:
+                continue
+            if len(words) and (base_distance(words, np.full(len(words), word)).min() < min_distance
+                               or base_distance(words, np.full(len(words), comp)).min() < min_distance):
+                continue
+            if len(halves) and any(base_distance(halves, np.full(len(halves), half)).min() < min_half_distance
+                                   for half in np.concatenate((word_halves, comp_halves))):
+                continue
+            words = np.append(words, word)
+            halves = np.concatenate((halves, word_halves))
+            if len(words) == count:
+                break
+    return [unpack(int(word)) for word in words]
+
+def load_codes(count: int, min_distance: int = MIN_DISTANCE, min_half_distance: int = MIN_HALF_DISTANCE,
+               min_gc: float = MIN_GC, max_gc: float = MAX_GC, cache_dir: str = CACHE_DIR) -> List[str]:
+    """
+    design_codes, through a cache of code books on disk keyed by the count, BASE and the constraints.
+    """
+    path = os.path.join(cache_dir, f"codes_{count}_{BASE}_{min_distance}_{min_half_distance}_{min_gc}_{max_gc}.json")
+    if os.path.exists(path):
+        with open(path) as cache_file:
+            return json.load(cache_file)
+    codes = design_codes(count, min_distance, min_half_distance, min_gc, max_gc)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, "w") as cache_file:
+        json.dump(codes, cache_file)
+    return codes
+
+def create_designed_sequences(vertices: List[str], **constraints) -> Dict[str, str]:
+    """
+    Like create_random_sequences, with sequences from a designed code book.
+    """
+    return dict(zip(vertices, load_codes(len(vertices), **constraints)))
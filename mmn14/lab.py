@@ -1,10 +1,17 @@
-from typing import List, Tuple, Dict
-import random 
+from typing import List, Tuple, Dict, Set
+from bisect import bisect_right
+import io
+import sys
+import numpy as np
 
 complementary_dict = {"A":"T", "T":"A", "G":"C", "C":"G"}
 NUCLEOTIDES = ["A", "T", "G", "C"]
 BASE = 20
 PRINT_LEN = 100
+PRINT_STRANDS = 20
+FASTA_LINE_LEN = 60
+#the middle line of a printed strand: a bond under every connected base
+MIDDLE_TABLE = str.maketrans({"A": "|", "T": "|", "G": "|", "C": "|", "-": " "})
 NUM_OF_REPS = 1
 
 class Nucleotide:
@@ -39,6 +46,7 @@ class DNAStrand:
     def __init__(self, sequence: str = None, start_seq: bool = None, start_nuc: Nucleotide = None):
         if start_nuc:
             self.start_nucleotide = start_nuc
+            self.length = 1
             return
         sequence = sequence.strip().upper()
         if len(sequence) == 0:
@@ -59,7 +67,10 @@ class DNAStrand:
                 self.free_nucs.append(temp)    
 
         self.end_nucleotide = temp    
-                
+        self.length = len(sequence)
+
+    def __len__(self):
+        return self.length
 
     def get_free_nucs(self) -> List[Nucleotide]:
         return self.free_nucs
@@ -78,112 +89,110 @@ class DNAStrand:
         """
         cool to 55 degrees, do stuff with primers, return 2 DNA molecules if success
         """
-        primers = []
-        if not primer1 or not primer2 or len(primer1) != len(primer2) != BASE:
-            raise Exception(f"Primers should be of len {BASE}")
+        return [Primer(self.nuc_at(offset), backwards) for _, offset, backwards in find_primer_sites([self.get_sequence()], primer1, primer2)]
+
+    def nuc_at(self, offset: int) -> Nucleotide:
         temp = self.start_nucleotide
-        while temp:
-            sequence = ""
-            length = BASE
-            cur_start = temp
-            prev = None
-            while temp and length > 0:
-                sequence += temp.value
-                prev = temp
-                temp = temp.next_nucleotide 
-                length -= 1
-            if sequence == primer1:
-                primers.append(Primer(cur_start, backwards=False)) 
-            elif sequence == primer2:
-                primers.append(Primer(prev, backwards=True))        
-        return primers
+        for i in range(offset):
+            temp = temp.next_nucleotide
+        return temp
     
-    def __str__(self):
-        first_strand = ""
+    def write(self, out):
+        """
+        Write the strand and the bases connected to it to out, PRINT_LEN characters a line.
+        """
+        first_strand = []
+        second_strand = []
         temp: Nucleotide = self.start_nucleotide
-        second_strand = ""
         while temp:
-            first_strand += temp.value
-            if temp.next_nucleotide:
-                first_strand += "-"
-            else:
-                first_strand += " "   
-            con_to_nuc = temp.connected_nucleotide  
+            first_strand.append(temp.value + ("-" if temp.next_nucleotide else " "))
+            con_to_nuc = temp.connected_nucleotide
             if con_to_nuc:
-                second_strand += temp.connected_nucleotide.value
-                if con_to_nuc.next_nucleotide:
-                    second_strand += "-"
-                else:
-                    second_strand += " "
+                second_strand.append(con_to_nuc.value + ("-" if con_to_nuc.next_nucleotide else " "))
             else:
-                second_strand += "  "        
+                second_strand.append("  ")
             temp = temp.next_nucleotide
-        middle = ""    
-        for base in second_strand:
-            if base in NUCLEOTIDES:
-                middle += "|"
-            else:
-                middle += " " 
-        n = len(first_strand)
-        result = first_strand[:PRINT_LEN] + "\n" + middle[:PRINT_LEN] + "\n" + second_strand[:PRINT_LEN]
-        while n > PRINT_LEN:
-            result += "\n"
-            first_strand = first_strand[PRINT_LEN:]
-            middle = middle[PRINT_LEN:]
-            second_strand = second_strand[PRINT_LEN:]
-            result += first_strand[:PRINT_LEN] + "\n" + middle[:PRINT_LEN] + "\n" + second_strand[:PRINT_LEN]
-            n -= PRINT_LEN
-        result += "\n\n\n\n"
-        return result    
+        first_strand = "".join(first_strand)
+        second_strand = "".join(second_strand)
+        middle = second_strand.translate(MIDDLE_TABLE)
+        for i in range(0, len(first_strand), PRINT_LEN):
+            out.write(first_strand[i:i+PRINT_LEN] + "\n" + middle[i:i+PRINT_LEN] + "\n" + second_strand[i:i+PRINT_LEN] + "\n")
+        out.write("\n\n\n")
+
+    def __str__(self):
+        result = io.StringIO()
+        self.write(result)
+        return result.getvalue()
 
     def get_sequence(self) -> str:
-        sequence = ""
+        sequence = []
         temp = self.start_nucleotide
         while temp:
-            sequence += temp.value
+            sequence.append(temp.value)
             temp = temp.next_nucleotide
-        return sequence    
+        return "".join(sequence)
 
 class TestTube:
-    def __init__(self, DNA_strands: List[DNAStrand]):
+    """
+    rng - the numpy Generator of the random choices of the tube, or a seed of one
+    """
+    def __init__(self, DNA_strands: List[DNAStrand], rng = None):
+        self.rng = make_rng(rng)
         self.pool = []
         self.strands = DNA_strands
         for DNA_strand in DNA_strands:
             self.pool += DNA_strand.get_free_nucs()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        """
+        Tubes that hold workers, like ParallelTestTube, release them here.
+        """
+        pass
+
     def denaturation(self):
         for strand in self.strands:
             strand.denaturation()
 
-    def annealing(self, start_primer, end_primer) -> List[Nucleotide]:
-        primers = []
-        for strand in self.strands:
-            primers += strand.annealing(start_primer, end_primer)
-        return primers
+    def annealing(self, start_primer, end_primer) -> List[Primer]:
+        """
+        Search the primer sites of all the strands at once.
+        """
+        sites = find_primer_sites([strand.get_sequence() for strand in self.strands], start_primer, end_primer)
+        return [Primer(self.strands[index].nuc_at(offset), backwards) for index, offset, backwards in sites]
     
     def polymerase(self, primers: List[Primer]):
         for primer in primers:
             cur_nuc = primer.start_nuc
+            if cur_nuc.connected_nucleotide:
+                #an earlier primer already extended over this one
+                continue
             if primer.backwards:
                 next_nuc = None
                 while cur_nuc and not cur_nuc.connected_nucleotide:
                     cur_nuc.connected_nucleotide = Nucleotide(None, next_nuc, complementary_dict[cur_nuc.value], cur_nuc)
                     if cur_nuc == primer.start_nuc:
-                        strand = DNAStrand(start_nuc=cur_nuc)
+                        strand = DNAStrand(start_nuc=cur_nuc.connected_nucleotide)
+                    else:
+                        strand.length += 1
                     if next_nuc:
                         next_nuc.prev_nucleotide = cur_nuc.connected_nucleotide
                         cur_nuc.connected_nucleotide.next_nucleotide = next_nuc
                     next_nuc = cur_nuc.connected_nucleotide
                     cur_nuc = cur_nuc.prev_nucleotide
-                strand.end_nucleotide = strand.start_nucleotide
-                strand.start_nucleotide = next_nuc 
+                strand.end_nucleotide = primer.start_nuc.connected_nucleotide
+                strand.start_nucleotide = next_nuc
 
             else:
                 prev_nuc = None    
                 while cur_nuc and not cur_nuc.connected_nucleotide:
                     cur_nuc.connected_nucleotide = Nucleotide(prev_nuc, None, complementary_dict[cur_nuc.value], cur_nuc)
                     if cur_nuc == primer.start_nuc:
-                        strand = DNAStrand(start_nuc=cur_nuc)
+                        strand = DNAStrand(start_nuc=cur_nuc.connected_nucleotide)
+                    else:
+                        strand.length += 1
                     if prev_nuc:
                         prev_nuc.next_nucleotide = cur_nuc.connected_nucleotide
                         cur_nuc.connected_nucleotide.prev_nucleotide = prev_nuc
@@ -192,11 +201,19 @@ class TestTube:
                 strand.end_nucleotide = prev_nuc    
             self.strands.append(strand)
 
-    def ligation(self):
+    def ligation(self, indexed: bool = False):
         """
-        Combines and repairs DNA strands, create potential paths
+        Combines and repairs DNA strands, create potential paths.
+        indexed - find partners through a k-mer index instead of scanning the whole pool
         """
-        random.shuffle(self.pool)
+        if indexed:
+            self.pair_free_nucs_indexed()
+        else:
+            self.pair_free_nucs()
+        self.join_strands()
+
+    def pair_free_nucs(self):
+        self.rng.shuffle(self.pool)
         n = len(self.pool)
         i = 0
         while i < n:
@@ -207,26 +224,99 @@ class TestTube:
                     nuc1, nuc2 = self.pool[i], self.pool[j]
                     self.pool.remove(nuc1)
                     self.pool.remove(nuc2)
-                    for x in range(length):
-                        nuc1.connect(nuc2)
-                        nuc2.connect(nuc1)
-                        nuc1, nuc2 = nuc1.next_nucleotide, nuc2.next_nucleotide
+                    connect_nucs(nuc1, nuc2, length)
                     n -= 2
+                    #the next nucleotide moved into place i, so it is tried too
                     break
                 j += 1
-            i += 1        
+            else:
+                i += 1
+
+    def pair_free_nucs_indexed(self):
+        """
+        Every free nucleotide is hashed by its first BASE // 2 bases, 
+        and looks for a partner in the bucket of the complementary k-mer.
+        Buckets are shuffled, so a partner is still chosen at random.
+        """
+        self.rng.shuffle(self.pool)
+        keys = [get_free_end(nuc) for nuc in self.pool]
+        buckets: Dict[str, List[Nucleotide]] = {}
+        for nuc, key in zip(self.pool, keys):
+            buckets.setdefault(key, []).append(nuc)
+        for bucket in buckets.values():
+            self.rng.shuffle(bucket)
+        used = set()
+        for nuc1, key in zip(self.pool, keys):
+            if id(nuc1) in used:
+                continue
+            bucket = buckets.get(create_complementary(key), [])
+            while bucket:
+                nuc2 = bucket.pop()
+                if id(nuc2) in used:
+                    continue
+                length = check_if_complementary(nuc1, nuc2)
+                if length > 0:
+                    used.add(id(nuc1))
+                    used.add(id(nuc2))
+                    connect_nucs(nuc1, nuc2, length)
+                    break
+        self.pool = [nuc for nuc in self.pool if id(nuc) not in used]
+
+    def join_strands(self):
+        joined = []
         for strand in self.strands:
             end_nuc = strand.end_nucleotide
             if end_nuc.connected_nucleotide and end_nuc.connected_nucleotide.next_nucleotide and end_nuc.connected_nucleotide.next_nucleotide.connected_nucleotide and not end_nuc.next_nucleotide:
                 end_nuc.next_nucleotide = end_nuc.connected_nucleotide.next_nucleotide.connected_nucleotide
                 end_nuc.next_nucleotide.prev_nucleotide = end_nuc
+                joined.append(strand)
+        self.update_lengths(joined)
+
+    def update_lengths(self, joined: List[DNAStrand]):
+        """
+        A joined strand now continues into the chain after its old end, which may have been joined too.
+        Its length is its old length plus the length of that chain.
+        """
+        starts = {id(strand.start_nucleotide): strand for strand in self.strands}
+        old_lengths = {id(strand): strand.length for strand in joined}
+        done = set()
+
+        def chain_length(nuc: Nucleotide, visiting: Set[int]) -> int:
+            length = 0
+            while nuc:
+                strand = starts.get(id(nuc))
+                if strand:
+                    #a chain that goes back into itself is counted once
+                    return length if id(strand) in visiting else length + total_length(strand, visiting)
+                length += 1
+                nuc = nuc.next_nucleotide
+            return length
+
+        def total_length(strand: DNAStrand, visiting: Set[int]) -> int:
+            if id(strand) in old_lengths and id(strand) not in done:
+                done.add(id(strand))
+                strand.length = old_lengths[id(strand)] + chain_length(strand.end_nucleotide.next_nucleotide, visiting | {id(strand)})
+            return strand.length
+
+        for strand in joined:
+            total_length(strand, set())
 
     def gel_elecro(self, num_of_muls):
-        new_strands = []        
+        """
+        Keep the strands of length BASE * num_of_muls, using the lengths strands keep.
+        self.bands keeps the histogram of the lengths before the gel.
+        """
+        self.bands = self.get_bands()
+        self.strands = [strand for strand in self.strands if len(strand) == BASE*num_of_muls]
+
+    def get_bands(self) -> Dict[int, int]:
+        """
+        Number of molecules of every length.
+        """
+        bands: Dict[int, int] = {}
         for strand in self.strands:
-            if len(strand.get_sequence())==BASE*num_of_muls:
-                new_strands.append(strand)
-        self.strands = new_strands
+            bands[len(strand)] = bands.get(len(strand), 0) + self.get_copies(strand)
+        return dict(sorted(bands.items()))
 
     def pcr(self, primer1: str, primer2: str):
         for i in range(NUM_OF_REPS):
@@ -234,59 +324,106 @@ class TestTube:
             primers = self.annealing(primer1, primer2)
             self.polymerase(primers)
 
-    def perform_magnetic_in_row(self, formulas: List[str]) -> List[str]:
+    def perform_magnetic_in_row(self, formulas: List[List[str]]):
+        """
+        Keep the strands that have a vertex of every clause.
+        Every distinct sequence is checked once: its vertices (BASE long words at aligned offsets) are put in a set,
+        and a clause is satisfied if it intersects that set.
+        """
+        clauses = [set(clause) for clause in formulas]
         #cache for efficiency
+        is_ok: Dict[str, bool] = {}
         ok = []
-        not_ok = []
         for strand in self.strands:
-            if strand not in ok and strand not in not_ok:
-                for clause in formulas:
-                    clause_sat = False
-                    sequence = strand.get_sequence()
-                    for symbol in clause:
-                        if symbol in sequence:
-                            clause_sat = True
-                            break
-                    if not clause_sat:    
-                        not_ok.append(sequence)
-                        #clause not satisfied - strand is not ok
-                        break
-                if clause_sat:    
-                    ok.append(strand)                      
+            sequence = strand.get_sequence()
+            if sequence not in is_ok:
+                is_ok[sequence] = satisfies(sequence, clauses)
+            if is_ok[sequence]:
+                ok.append(strand)
         self.strands = ok
     
-    def solve(self, primer1: str, primer2: str, formulas: List[str], num_of_muls: int):
-        self.ligation()
+    def solve(self, primer1: str, primer2: str, formulas: List[List[str]], num_of_muls: int, indexed: bool = False, show: bool = True):
+        self.ligation(indexed)
         self.pcr(primer1, primer2)
         self.gel_elecro(num_of_muls)
         self.perform_magnetic_in_row(formulas)
-        print(self)
+        if show:
+            self.write(sys.stdout, PRINT_STRANDS)
 
-    def translate(self, sequences):
-        done = []
-        result = []
+    def translate(self, sequences: Dict[str, str]) -> List[List[str]]:
+        return list(self.iter_translate(sequences))
+
+    def iter_translate(self, sequences: Dict[str, str]):
+        """
+        Decode the distinct strands into the vertices of their paths, 
+        yield every path as soon as its strand is decoded.
+        """
+        vertices = invert_sequences(sequences)
+        done = set()
         for strand in self.strands:
-            cur_res = []
             sequence = strand.get_sequence()
             if sequence not in done:
-                for index in range(len(sequences)):
-                    found = False
-                    for key, value in sequences.items():
-                        if value == sequence[index*BASE:(index+1)*BASE]:
-                            cur_res.append(key)
-                            found = True
-                    if not found:
-                        break 
-                done.append(sequence)                  
-            if cur_res:
-                result.append(cur_res)
-        return result        
+                done.add(sequence)
+                path = decode_path(sequence, vertices)
+                if path:
+                    yield path
 
-    def __str__(self):
-        result = ""
+    def count_translations(self, sequences: Dict[str, str]) -> Dict[Tuple[str, ...], int]:
+        """
+        Number of molecules of every decoded path.
+        """
+        vertices = invert_sequences(sequences)
+        paths: Dict[str, List[str]] = {}
+        counts: Dict[Tuple[str, ...], int] = {}
         for strand in self.strands:
-            result += str(strand)
-        return result
+            sequence = strand.get_sequence()
+            if sequence not in paths:
+                paths[sequence] = decode_path(sequence, vertices)
+            if paths[sequence]:
+                path = tuple(paths[sequence])
+                counts[path] = counts.get(path, 0) + self.get_copies(strand)
+        return counts
+
+    def get_copies(self, strand) -> int:
+        """
+        Number of molecules a strand of the tube stands for.
+        """
+        return 1
+
+    def write(self, out, limit: int = None, sample: int = None, rng = None):
+        """
+        Write the strands to out one at a time, so the tube is never rendered as a whole.
+        limit - write at most limit strands, and the number of strands left out
+        sample - write sample strands picked at random instead of the first ones
+        rng - Generator or seed of the sample, not the tube's own so printing does not change the run
+        """
+        strands = self.strands
+        if sample is not None and sample < len(strands):
+            strands = [strands[i] for i in sorted(make_rng(rng).choice(len(strands), sample, replace=False))]
+        if limit is not None:
+            strands = strands[:limit]
+        for strand in strands:
+            strand.write(out)
+        if len(strands) < len(self.strands):
+            out.write(f"... {len(self.strands) - len(strands)} more strands\n")
+
+    def write_fasta(self, out, limit: int = None, line_len: int = FASTA_LINE_LEN):
+        """
+        Write the strands to out in FASTA, a record for every strand with its length and number of copies.
+        """
+        for i, strand in enumerate(self.strands[:limit]):
+            sequence = strand.get_sequence()
+            out.write(f">strand_{i} length={len(sequence)} copies={self.get_copies(strand)}\n")
+            for j in range(0, len(sequence), line_len):
+                out.write(sequence[j:j+line_len] + "\n")
+
+    def __str__(self):
+        """
+        The first PRINT_STRANDS strands, use write for more.
+        """
+        result = io.StringIO()
+        self.write(result, PRINT_STRANDS)
+        return result.getvalue()
 
     def print_all_sequences(self):
         for strand in self.strands:
@@ -299,13 +436,74 @@ def create_complementary(sequence: str) -> str:
         complementary += complementary_dict[nuc]
     return complementary
 
-def create_random_sequences(vertices: List[str]) -> Dict[str, str]:   
+def invert_sequences(sequences: Dict[str, str]) -> Dict[str, List[str]]:
+    vertices: Dict[str, List[str]] = {}
+    for vertex, sequence in sequences.items():
+        vertices.setdefault(sequence, []).append(vertex)
+    return vertices
+
+def decode_path(sequence: str, vertices: Dict[str, List[str]]) -> List[str]:
+    """
+    The vertices of the BASE long words of sequence, up to the first word that is not a vertex.
+    vertices - the sequence -> vertices map from invert_sequences
+    """
+    path = []
+    for index in range(0, len(sequence), BASE):
+        word = sequence[index:index + BASE]
+        if word not in vertices:
+            break
+        path += vertices[word]
+    return path
+
+def get_vertices(sequence: str) -> Set[str]:
+    return {sequence[index:index + BASE] for index in range(0, len(sequence), BASE)}
+
+def satisfies(sequence: str, clauses: List[Set[str]]) -> bool:
+    """
+    Does the path of sequence go through a vertex of every clause.
+    """
+    vertices = get_vertices(sequence)
+    return all(not vertices.isdisjoint(clause) for clause in clauses)
+
+def find_primer_sites(sequences: List[str], primer1: str, primer2: str) -> List[Tuple[int, int, bool]]:
+    """
+    Find where primer1 and primer2 anneal, on all the sequences at once.
+    The sequences are joined with a separator and searched with str.find, 
+    a site counts only if it starts at a multiple of BASE in its own sequence.
+    Return (sequence index, offset of the primer nucleotide, backwards) sorted like DNAStrand.annealing finds them.
+    primer2 sites are backwards, so their primer nucleotide is the last base of the site.
+    """
+    if not primer1 or not primer2 or len(primer1) != len(primer2) != BASE:
+        raise Exception(f"Primers should be of len {BASE}")
+    starts = []
+    position = 0
+    for sequence in sequences:
+        starts.append(position)
+        position += len(sequence) + 1
+    buffer = "|".join(sequences)
+    sites = {}
+    for primer, backwards in ((primer2, True), (primer1, False)):
+        found = buffer.find(primer)
+        while found != -1:
+            index = bisect_right(starts, found) - 1
+            offset = found - starts[index]
+            if offset % BASE == 0:
+                # a window that matches both primers is a primer1 site
+                sites[(index, offset)] = backwards
+            found = buffer.find(primer, found + 1)
+    return [(index, offset + BASE - 1 if backwards else offset, backwards) for (index, offset), backwards in sorted(sites.items())]
+
+def make_rng(rng = None) -> np.random.Generator:
+    """
+    A numpy Generator from a seed, or rng itself if it is already a Generator.
+    """
+    return np.random.default_rng(rng)
+
+def create_random_sequences(vertices: List[str], rng = None) -> Dict[str, str]:   
+    rng = make_rng(rng)
     sequences = {}
     for vertex in vertices:
-        next_seq = ""
-        for j in range(BASE):
-            next_seq += NUCLEOTIDES[random.randint(0, 3)]
-        sequences[vertex] = next_seq 
+        sequences[vertex] = "".join(NUCLEOTIDES[i] for i in rng.integers(0, 4, BASE))
     return sequences
 
 def create_edges(start_vertex: str, end_vertex: str, edges: List[Tuple[str, str]], vertices_molecules: Dict[str, str]) -> List[str]:
@@ -344,8 +542,17 @@ def check_if_complementary(start_seq1: Nucleotide, start_seq2: Nucleotide):
     return BASE // 2
 
 
-    
-        
-    
-
-
+def connect_nucs(nuc1: Nucleotide, nuc2: Nucleotide, length: int):
+    for x in range(length):
+        nuc1.connect(nuc2)
+        nuc1, nuc2 = nuc1.next_nucleotide, nuc2.next_nucleotide
+
+def get_free_end(nuc: Nucleotide) -> str:
+    """
+    Return the first BASE // 2 bases starting at nuc - the part that has to match for ligation.
+    """
+    key = ""
+    while nuc and len(key) < BASE // 2:
+        key += nuc.value
+        nuc = nuc.next_nucleotide
+    return key
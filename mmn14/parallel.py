@@ -0,0 +1,47 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+import os
+import zlib
+import numpy as np
+from lab import *
+from strand_store import StrandStore, PackedTestTube, pair_free_ends, half_keys
+
+
+def pair_shard(args) -> List[Tuple[int, int, int]]:
+    nucs, reads, rng = args
+    return pair_free_ends(nucs, reads, rng)
+
+
+class ParallelTestTube(PackedTestTube):
+    """
+    PackedTestTube that pairs the free ends of ligation in a pool of worker processes.
+    Ligation is sharded by k-mer, so every free end is in the same shard as all its possible partners.
+    Every shard gets its own random stream, spawned from the tube's Generator.
+    The other stages run as in PackedTestTube, SATInstance.solve runs them on counted strands anyway.
+    Use the tube in a with block, or close it, to shut its workers down.
+    """
+    def __init__(self, store: StrandStore, workers: int = None, rng = None):
+        super().__init__(store, rng)
+        self.workers = workers or os.cpu_count()
+        self.executor = ProcessPoolExecutor(self.workers)
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __exit__(self, *args):
+        self.close()
+
+    def pair_free_nucs_indexed(self):
+        nucs = np.array(self.pool, dtype=np.int64)
+        reads = self.store.free_end_keys(nucs, BASE)
+        comp_keys = half_keys(np.where(reads == 255, 255, 3 - reads).astype(np.uint8))
+        shards = [[] for _ in range(self.workers)]
+        for index, (key, comp_key) in enumerate(zip(half_keys(reads), comp_keys)):
+            # an end and its complementary ends share the smaller of the two keys
+            shards[zlib.crc32(min(key, comp_key)) % self.workers].append(index)
+        shards = [shard for shard in shards if shard]
+        args = [(nucs[shard], reads[shard], rng) for shard, rng in zip(shards, self.rng.spawn(len(shards)))]
+        pairs = []
+        for shard_pairs in self.executor.map(pair_shard, args):
+            pairs += shard_pairs
+        self.connect_pairs(pairs)
@@ -0,0 +1,464 @@
+from bisect import bisect_right, insort
+from typing import List, Dict, Tuple
+import numpy as np
+from lab import *
+
+# bases are stored as codes in which the complementary base is always 3 - code
+LETTERS = np.frombuffer(b"ACGT", dtype=np.uint8)
+ENCODE = np.full(256, 255, dtype=np.uint8)
+ENCODE[LETTERS] = np.arange(len(LETTERS), dtype=np.uint8)
+NO_NUC = -1
+
+
+def encode(sequence: str) -> np.ndarray:
+    return ENCODE[np.frombuffer(sequence.encode(), dtype=np.uint8)]
+
+def decode(codes: np.ndarray) -> str:
+    return LETTERS[codes].tobytes().decode()
+
+def complementary_length(codes1: np.ndarray, codes2: np.ndarray) -> int:
+    """
+    Same as check_if_complementary in lab.py, on the codes of two ends (padded with 255 past their end).
+    """
+    n = min(np.count_nonzero(codes1 != 255), np.count_nonzero(codes2 != 255))
+    mismatches = np.flatnonzero(3 - codes1[:n] != codes2[:n])
+    if len(mismatches):
+        return BASE // 2 if mismatches[0] >= BASE // 2 else 0
+    if n > BASE // 2:
+        return BASE
+    return BASE // 2
+
+def complementary_lengths(reads1: np.ndarray, reads2: np.ndarray) -> np.ndarray:
+    """
+    complementary_length of every row of reads1 with the same row of reads2, at once.
+    """
+    n = np.minimum(np.count_nonzero(reads1 != 255, axis=1), np.count_nonzero(reads2 != 255, axis=1))
+    mismatches = (3 - reads1 != reads2) & (np.arange(reads1.shape[1]) < n[:, None])
+    matched = np.where(n > BASE // 2, BASE, BASE // 2)
+    return np.where(mismatches.any(axis=1), np.where(mismatches.argmax(axis=1) >= BASE // 2, BASE // 2, 0), matched)
+
+def half_keys(reads: np.ndarray) -> List[bytes]:
+    """
+    The first BASE // 2 codes of every row, as bytes.
+    """
+    return np.ascontiguousarray(reads[:, :BASE // 2]).view(f"V{BASE // 2}").ravel().tolist()
+
+def pair_free_ends(nucs: List[int], reads: np.ndarray, rng = None) -> List[Tuple[int, int, int]]:
+    """
+    Pair free ends at random through a k-mer index, like TestTube.pair_free_nucs_indexed.
+    reads - the first BASE codes of every free end, see StrandStore.free_end_keys
+    rng - numpy Generator or seed, it makes the same draws as the pool shuffles of TestTube
+    Return (nuc1, nuc2, length) of every pair.
+    """
+    rng = make_rng(rng)
+    nucs = np.asarray(nucs, dtype=np.int64)
+    order = list(range(len(nucs)))
+    rng.shuffle(order)
+    keys = half_keys(reads)
+    comp_keys = half_keys(np.where(reads == 255, 255, 3 - reads).astype(np.uint8))
+    buckets: Dict[bytes, List[int]] = {}
+    for index in order:
+        buckets.setdefault(keys[index], []).append(index)
+    for bucket in buckets.values():
+        rng.shuffle(bucket)
+    used = set()
+    pairs = []
+    for index1 in order:
+        if index1 in used:
+            continue
+        bucket = buckets.get(comp_keys[index1], [])
+        while bucket:
+            index2 = bucket.pop()
+            # the first halves of a bucket are complementary, so every pair found anneals over at least BASE // 2
+            if index2 not in used:
+                used.add(index1)
+                used.add(index2)
+                pairs.append((index1, index2))
+                break
+    if not pairs:
+        return []
+    index1, index2 = np.array(pairs, dtype=np.int64).T
+    lengths = complementary_lengths(reads[index1], reads[index2])
+    return list(zip(nucs[index1].tolist(), nucs[index2].tolist(), lengths.tolist()))
+
+
+class StrandStore:
+    """
+    All the bases of a test tube, packed in one contiguous uint8 array.
+    Every molecule that is added or synthesized gets its own block of the array,
+    inside a block the next base of i is i + 1.
+    paired[i] is the index of the base that i is connected to, or NO_NUC.
+    Ligation is the only thing that connects blocks, so the links between blocks are kept in dicts.
+    """
+    def __init__(self, capacity: int = 1024):
+        self.bases = np.zeros(capacity, dtype=np.uint8)
+        self.paired = np.full(capacity, NO_NUC, dtype=np.int32)
+        self.size = 0
+        self.block_starts: List[int] = []
+        self.next_links: Dict[int, int] = {}
+        self.prev_links: Dict[int, int] = {}
+        self.prev_link_keys: List[int] = []
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.lengths: List[int] = []
+        self.free_nucs: List[int] = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def reserve(self, size: int):
+        capacity = len(self.bases)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        bases = np.zeros(capacity, dtype=np.uint8)
+        bases[:self.size] = self.bases[:self.size]
+        paired = np.full(capacity, NO_NUC, dtype=np.int32)
+        paired[:self.size] = self.paired[:self.size]
+        self.bases, self.paired = bases, paired
+
+    def allocate(self, codes: np.ndarray) -> int:
+        """
+        Copy codes into a new block, and add it as a new strand.
+        """
+        start = self.size
+        self.reserve(start + len(codes))
+        self.bases[start:start + len(codes)] = codes
+        self.size += len(codes)
+        self.block_starts.append(start)
+        self.starts.append(start)
+        self.ends.append(self.size - 1)
+        self.lengths.append(len(codes))
+        return len(self.starts) - 1
+
+    def add_strand(self, sequence: str, start_seq: bool = False) -> int:
+        sequence = sequence.strip().upper()
+        if len(sequence) == 0:
+            raise Exception("DNA sequence should not be empty")
+        codes = encode(sequence)
+        if (codes > 3).any():
+            raise Exception("DNA sequence should contain only A, T, G, C")
+        strand = self.allocate(codes)
+        start = self.starts[strand]
+        self.free_nucs.append(start)
+        free_offset = BASE if start_seq else BASE // 2
+        if free_offset < len(codes):
+            self.free_nucs.append(start + free_offset)
+        return strand
+
+    def block_index(self, nuc: int) -> int:
+        """
+        Every strand has its own block, so this is also the strand of the block.
+        """
+        return bisect_right(self.block_starts, nuc) - 1
+
+    def block_start(self, nuc: int) -> int:
+        return self.block_starts[bisect_right(self.block_starts, nuc) - 1]
+
+    def block_end(self, nuc: int) -> int:
+        index = bisect_right(self.block_starts, nuc)
+        if index == len(self.block_starts):
+            return self.size - 1
+        return self.block_starts[index] - 1
+
+    def block_ends(self, nucs: np.ndarray) -> np.ndarray:
+        """
+        block_end of every one of nucs.
+        """
+        starts = np.array(self.block_starts)
+        ends = np.append(starts[1:], self.size) - 1
+        return ends[np.searchsorted(starts, nucs, side="right") - 1]
+
+    def next(self, nuc: int) -> int:
+        if nuc < self.block_end(nuc):
+            return nuc + 1
+        return self.next_links.get(nuc, NO_NUC)
+
+    def prev(self, nuc: int) -> int:
+        if nuc in self.prev_links:
+            return self.prev_links[nuc]
+        if nuc > self.block_start(nuc):
+            return nuc - 1
+        return NO_NUC
+
+    def link(self, end_nuc: int, next_nuc: int):
+        """
+        Ligation of end_nuc, which ends a block, to next_nuc.
+        """
+        self.next_links[end_nuc] = next_nuc
+        if next_nuc not in self.prev_links:
+            insort(self.prev_link_keys, next_nuc)
+        self.prev_links[next_nuc] = end_nuc
+
+    def segments(self, nuc: int):
+        """
+        Yield the contiguous (first, last) index ranges of the chain that starts at nuc.
+        """
+        seen = set()
+        while nuc != NO_NUC and nuc not in seen:
+            seen.add(nuc)
+            last = self.block_end(nuc)
+            yield nuc, last
+            nuc = self.next_links.get(last, NO_NUC)
+
+    def backward_segments(self, nuc: int):
+        """
+        Yield the contiguous (first, last) index ranges walking back from nuc through prev.
+        """
+        seen = set()
+        while nuc != NO_NUC and nuc not in seen:
+            seen.add(nuc)
+            first = self.block_start(nuc)
+            index = bisect_right(self.prev_link_keys, nuc)
+            if index > 0 and self.prev_link_keys[index - 1] > first:
+                first = self.prev_link_keys[index - 1]
+            yield first, nuc
+            nuc = self.prev(first)
+
+    def chain(self, nuc: int, length: int = None) -> np.ndarray:
+        """
+        Indices of (at most length) bases of the chain that starts at nuc.
+        """
+        parts = []
+        for first, last in self.segments(nuc):
+            if length is not None:
+                last = min(last, first + length - 1)
+                length -= last - first + 1
+            parts.append(np.arange(first, last + 1))
+            if length is not None and length <= 0:
+                break
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def read(self, nuc: int, length: int) -> np.ndarray:
+        return self.bases[self.chain(nuc, length)]
+
+    def codes(self, strand: int) -> np.ndarray:
+        return np.concatenate([self.bases[first:last + 1] for first, last in self.segments(self.starts[strand])])
+
+    def sequence(self, strand: int) -> str:
+        return decode(self.codes(strand))
+
+    def chain_rests(self) -> Dict[int, int]:
+        """
+        The length of the chain after the end of every linked block, None for a chain that goes back into itself.
+        Every block is walked once, a chain that reaches a block walked before adds up the rest of that block.
+        """
+        rests: Dict[int, int] = {}
+        for end_nuc in self.next_links:
+            path, on_path = [], set()
+            block = self.block_index(end_nuc)
+            while block is not None and block not in rests and block not in on_path:
+                path.append(block)
+                on_path.add(block)
+                nuc = self.next_links.get(self.ends[block], NO_NUC)
+                block = None if nuc == NO_NUC else self.block_index(nuc)
+            if block in on_path:
+                rests.update(dict.fromkeys(path))
+                continue
+            for block in reversed(path):
+                nuc = self.next_links.get(self.ends[block], NO_NUC)
+                if nuc == NO_NUC:
+                    rests[block] = 0
+                else:
+                    after = self.block_index(nuc)
+                    rests[block] = None if rests[after] is None else self.ends[after] - nuc + 1 + rests[after]
+        return rests
+
+    def update_lengths(self):
+        """
+        Lengths change only when blocks are linked, a strand is its block and the chain after it.
+        Chains that go back into themselves are summed over their segments.
+        """
+        for block, rest in self.chain_rests().items():
+            if rest is None:
+                self.lengths[block] = sum(last - first + 1 for first, last in self.segments(self.starts[block]))
+            else:
+                self.lengths[block] = self.ends[block] - self.starts[block] + 1 + rest
+
+    def nuc_at(self, strand: int, offset: int) -> int:
+        for first, last in self.segments(self.starts[strand]):
+            if offset <= last - first:
+                return first + offset
+            offset -= last - first + 1
+        return NO_NUC
+
+    def connect(self, nuc1: int, nuc2: int, length: int):
+        chain1, chain2 = self.chain(nuc1, length), self.chain(nuc2, length)
+        n = min(len(chain1), len(chain2))
+        self.paired[chain1[:n]] = chain2[:n]
+        self.paired[chain2[:n]] = chain1[:n]
+
+    def connect_all(self, nucs1: np.ndarray, nucs2: np.ndarray, lengths: np.ndarray):
+        """
+        connect every nucs1[i] to nucs2[i] over lengths[i], in order, with one assignment.
+        Chains that stay inside their block are index ranges, only the others are walked.
+        """
+        offsets = np.arange(BASE)
+        chains = np.full((len(lengths), 2, BASE), NO_NUC, dtype=np.int64)
+        for side, nucs in enumerate((nucs1, nucs2)):
+            inside = nucs + lengths - 1 <= self.block_ends(nucs)
+            chains[inside, side] = np.where(offsets < lengths[inside, None], nucs[inside, None] + offsets, NO_NUC)
+            for row in np.flatnonzero(~inside):
+                chain = self.chain(int(nucs[row]), int(lengths[row]))
+                chains[row, side, :len(chain)] = chain
+        n = np.count_nonzero(chains != NO_NUC, axis=2).min(axis=1)
+        mask = np.broadcast_to((offsets < n[:, None])[:, None, :], chains.shape)
+        targets, values = chains[mask], chains[:, ::-1][mask]
+        # a base connected twice keeps its last partner, as with connect pair after pair
+        _, last = np.unique(targets[::-1], return_index=True)
+        keep = len(targets) - 1 - last
+        self.paired[targets[keep]] = values[keep]
+
+    def check_if_complementary(self, nuc1: int, nuc2: int) -> int:
+        """
+        Same as check_if_complementary in lab.py, on base indices.
+        """
+        return complementary_length(self.read(nuc1, BASE), self.read(nuc2, BASE))
+
+    def synthesize(self, template: np.ndarray) -> int:
+        """
+        Polymerase - build the complementary strand of the template bases, connected to them.
+        """
+        strand = self.allocate(3 - self.bases[template])
+        new_nucs = np.arange(self.starts[strand], self.ends[strand] + 1)
+        self.paired[new_nucs] = template
+        self.paired[template] = new_nucs
+        return strand
+
+    def free_template(self, nuc: int, backwards: bool) -> np.ndarray:
+        """
+        The unpaired bases polymerase can extend on from nuc, in strand order.
+        """
+        parts = []
+        if backwards:
+            for first, last in self.backward_segments(nuc):
+                taken = np.flatnonzero(self.paired[first:last + 1] != NO_NUC)
+                if len(taken):
+                    parts.append(np.arange(first + taken[-1] + 1, last + 1))
+                    break
+                parts.append(np.arange(first, last + 1))
+            parts.reverse()
+        else:
+            for first, last in self.segments(nuc):
+                taken = np.flatnonzero(self.paired[first:last + 1] != NO_NUC)
+                if len(taken):
+                    parts.append(np.arange(first, first + taken[0]))
+                    break
+                parts.append(np.arange(first, last + 1))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def free_end_keys(self, nucs: np.ndarray, length: int) -> np.ndarray:
+        """
+        The first length bases starting at each of nucs, as rows of a matrix.
+        Rows of ends that are too short are padded with 255.
+        """
+        keys = np.full((len(nucs), length), 255, dtype=np.uint8)
+        ends = self.block_ends(nucs)
+        # an end that runs past its block reads on only through a link, without one it is cut at the block
+        positions = nucs[:, None] + np.arange(length)
+        within = positions <= ends[:, None]
+        read = within[:, -1] | np.array([end not in self.next_links for end in ends.tolist()], dtype=bool)
+        keys[read] = np.where(within[read], self.bases[np.minimum(positions[read], self.size - 1)], 255)
+        for row in np.flatnonzero(~read):
+            codes = self.read(int(nucs[row]), length)
+            keys[row, :len(codes)] = codes
+        return keys
+
+    def to_dna_strand(self, strand: int) -> DNAStrand:
+        """
+        Object view of a strand and the bases connected to it, for debugging and printing.
+        """
+        nucs: Dict[int, Nucleotide] = {}
+        chain = self.chain(self.starts[strand]).tolist()
+        for index in chain + [int(self.paired[index]) for index in chain if self.paired[index] != NO_NUC]:
+            if index not in nucs:
+                nucs[index] = Nucleotide(None, None, chr(LETTERS[self.bases[index]]))
+        for prev_index, index in zip(chain, chain[1:]):
+            nucs[prev_index].next_nucleotide = nucs[index]
+            nucs[index].prev_nucleotide = nucs[prev_index]
+        for index, nuc in nucs.items():
+            if nuc.next_nucleotide is None:
+                nuc.next_nucleotide = nucs.get(self.next(index))
+            if nuc.prev_nucleotide is None:
+                nuc.prev_nucleotide = nucs.get(self.prev(index))
+            nuc.connected_nucleotide = nucs.get(int(self.paired[index]))
+        view = DNAStrand(start_nuc=nucs[chain[0]])
+        view.end_nucleotide = nucs[chain[-1]]
+        return view
+
+
+class PackedStrand:
+    """
+    Handle of a strand in a StrandStore, behaves like DNAStrand for TestTube.
+    """
+    def __init__(self, store: StrandStore, index: int):
+        self.store = store
+        self.index = index
+
+    def get_sequence(self) -> str:
+        return self.store.sequence(self.index)
+
+    def __len__(self):
+        return self.store.lengths[self.index]
+
+    def write(self, out):
+        self.store.to_dna_strand(self.index).write(out)
+
+    def __str__(self):
+        return str(self.store.to_dna_strand(self.index))
+
+
+class PackedTestTube(TestTube):
+    """
+    TestTube that keeps its strands in a StrandStore instead of Nucleotide objects.
+    """
+    def __init__(self, store: StrandStore, rng = None):
+        self.rng = make_rng(rng)
+        self.store = store
+        self.strands = [PackedStrand(store, index) for index in range(len(store))]
+        self.pool = list(store.free_nucs)
+
+    def denaturation(self):
+        self.store.paired[:self.store.size] = NO_NUC
+
+    def annealing(self, primer1: str, primer2: str) -> List[Primer]:
+        sites = find_primer_sites([strand.get_sequence() for strand in self.strands], primer1, primer2)
+        return [Primer(self.store.nuc_at(self.strands[index].index, offset), backwards) for index, offset, backwards in sites]
+
+    def polymerase(self, primers: List[Primer]):
+        for primer in primers:
+            template = self.store.free_template(primer.start_nuc, primer.backwards)
+            if len(template):
+                self.strands.append(PackedStrand(self.store, self.store.synthesize(template)))
+
+    def ligation(self, indexed: bool = True):
+        """
+        The store is always paired through the k-mer index.
+        """
+        self.pair_free_nucs_indexed()
+        self.join_strands()
+
+    def pair_free_nucs_indexed(self):
+        reads = self.store.free_end_keys(np.array(self.pool, dtype=np.int64), BASE)
+        self.connect_pairs(pair_free_ends(self.pool, reads, self.rng))
+
+    def connect_pairs(self, pairs: List[Tuple[int, int, int]]):
+        if not pairs:
+            return
+        nucs1, nucs2, lengths = np.array(pairs, dtype=np.int64).T
+        self.store.connect_all(nucs1, nucs2, lengths)
+        used = set(nucs1.tolist()) | set(nucs2.tolist())
+        self.pool = [nuc for nuc in self.pool if nuc not in used]
+
+    def join_strands(self):
+        store = self.store
+        for end_nuc in store.ends:
+            partner = store.paired[end_nuc]
+            #the end of a strand is the end of its block, only a link goes on from it
+            if partner == NO_NUC or end_nuc in store.next_links:
+                continue
+            after = store.next(int(partner))
+            if after != NO_NUC and store.paired[after] != NO_NUC:
+                store.link(end_nuc, int(store.paired[after]))
+        store.update_lengths()
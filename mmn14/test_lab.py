@@ -0,0 +1,50 @@
+import pytest
+from collections import Counter
+from cnf import SATInstance, random_formula
+
+AMOUNT = 100
+
+
+def instance(seed: int) -> SATInstance:
+    variables, formula = random_formula(3, 4, rng=seed)
+    return SATInstance(variables, formula, rng=seed)
+
+def strands(tube) -> Counter:
+    return Counter((strand.get_sequence(), len(strand)) for strand in tube.strands)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_packed_matches_reference(seed):
+    sat = instance(seed)
+    reference, packed = (sat.create_test_tube(AMOUNT, engine, rng=seed) for engine in ("reference", "packed"))
+    for tube in (reference, packed):
+        tube.ligation(indexed=True)
+    assert strands(reference) == strands(packed)
+    for tube in (reference, packed):
+        tube.pcr(sat.primer1, sat.primer2)
+    assert strands(reference) == strands(packed)
+    for tube in (reference, packed):
+        tube.gel_elecro(sat.num_of_muls)
+    assert reference.get_bands() == packed.get_bands()
+    for tube in (reference, packed):
+        tube.perform_magnetic_in_row(sat.formula_in_dna)
+    assert reference.translate(sat.sequences) == packed.translate(sat.sequences)
+
+def test_parallel_is_reproducible():
+    sat = instance(3)
+    runs = []
+    for run in range(2):
+        with sat.create_test_tube(AMOUNT, "parallel", workers=2, rng=3) as tube:
+            tube.ligation(indexed=True)
+            tube.pcr(sat.primer1, sat.primer2)
+        runs.append(strands(tube))
+    assert runs[0] == runs[1]
+
+@pytest.mark.parametrize("engine, indexed", [("reference", False), ("reference", True), ("packed", True)])
+def test_lengths_match_sequences(engine, indexed):
+    sat = instance(4)
+    tube = sat.create_test_tube(AMOUNT, engine, rng=4)
+    tube.ligation(indexed)
+    assert all(len(strand) == len(strand.get_sequence()) for strand in tube.strands)
+    tube.pcr(sat.primer1, sat.primer2)
+    assert all(len(strand) == len(strand.get_sequence()) for strand in tube.strands)